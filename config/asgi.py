@@ -2,6 +2,9 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Realtime endpoints (e.g. ``/api/events/requests/``) are only served through it,
+and the company authentication flow is routed to async views: the default
+settings module here is config.asgi_settings (ROOT_URLCONF = config.asgi_urls).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -11,6 +14,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.asgi_settings')
 
 application = get_asgi_application()
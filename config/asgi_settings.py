@@ -0,0 +1,12 @@
+"""
+ASGI (config.asgi) uchun sozlamalar: kompaniya autentifikatsiyasi async viewlarga yo'naltiriladi (config.asgi_urls).
+"""
+
+from config.settings import *  # noqa: F401, F403
+from config.settings import DATABASES, env
+
+ROOT_URLCONF = "config.asgi_urls"
+
+# Django hujjatlariga ko'ra ASGI da doimiy ulanishlar o'chiriladi (sync viewlar turli threadlarda ishlaydi)
+for database in DATABASES.values():
+    database["CONN_MAX_AGE"] = env.int("DB_ASGI_CONN_MAX_AGE", default=0)
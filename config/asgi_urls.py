@@ -0,0 +1,14 @@
+"""
+ASGI uchun URL konfiguratsiyasi: kompaniya autentifikatsiyasi async viewlarga yo'naltiriladi, qolganlari config.urls dagi kabi.
+"""
+
+from django.urls import path
+
+from config.urls import urlpatterns as sync_urlpatterns
+from project import async_views
+
+urlpatterns = [
+    path("api/company-auth/send_otp/", async_views.send_otp, name="company-auth-send-otp-async"),
+    path("api/company-auth/verify_otp/", async_views.verify_otp, name="company-auth-verify-otp-async"),
+    path("api/company-auth/get_me/", async_views.get_me, name="company-auth-get-me-async"),
+] + sync_urlpatterns
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 from environs import Env
@@ -13,6 +14,9 @@ SECRET_KEY = "django-insecure-c^^#r1_io2bbj+iy=bc5t7*vngl)_^=6nk0)$napacv3x50v9-
 
 DEBUG = env.bool("DEBUG", default=False)
 BOT_TOKEN = env.str("BOT_TOKEN")
+OTP_CHAT_ID = env.str("OTP_CHAT_ID", default="-1002354764356")
+OTP_THREAD_ID = env.int("OTP_THREAD_ID", default=236)
+OTP_LIFETIME = timedelta(minutes=env.int("OTP_LIFETIME_MINUTES", default=5))
 
 ALLOWED_HOSTS = ["*"]
 CORS_ALLOW_ALL_ORIGINS = True
@@ -38,6 +42,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "project.middleware.CompressionMiddleware",
+    "project.middleware.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -46,8 +52,17 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "project.middleware.CompanyMiddleware",
+    "project.middleware.ProfilingMiddleware",
 ]
 
+PROFILING = {
+    # Yoqilmagan bo'lsa ProfilingMiddleware umuman ishlamaydi
+    "ENABLED": env.bool("PROFILING", default=False),
+    "SLOW_REQUEST_MS": env.int("PROFILING_SLOW_REQUEST_MS", default=500),
+    "TOP_STATEMENTS": 5,
+    "MAX_SAMPLES": 1000,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -62,9 +77,86 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_PAGINATION_CLASS": "project.paginations.PageSizePagination",
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_RENDERER_CLASSES": [
+        "project.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        # `Accept: application/msgpack` faqat msgpack o'rnatilgan bo'lsa
+        *(["project.renderers.MessagePackRenderer"] if find_spec("msgpack") else []),
+    ],
     "PAGE_SIZE": 2,
+    # Ilova oldidagi ishonchli proksilar soni. 0 bo'lsa mijoz IP si REMOTE_ADDR dan olinadi, X-Forwarded-For
+    # mijoz tomonidan soxtalashtirilishi mumkin (OTP cheklovlari IP bo'yicha)
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0),
+}
+
+COMPRESSION = {
+    # Bundan kichik javoblar siqilmaydi (bayt)
+    "MIN_SIZE": env.int("COMPRESSION_MIN_SIZE", default=1024),
+    "BROTLI_QUALITY": env.int("COMPRESSION_BROTLI_QUALITY", default=5),
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/msgpack",
+        "text/html",
+        "text/plain",
+        "text/css",
+        "application/javascript",
+    ],
+}
+
+OTP_THROTTLE = {
+    # Amal -> cheklov -> (so'rovlar soni, oyna soniyalarda)
+    "RATES": {
+        "send_otp": {"ip": (20, 60), "stir": (3, 300)},
+        "verify_otp": {"ip": (60, 60), "phone": (10, 300)},
+    },
+    # Shuncha noto'g'ri koddan keyin raqam LOCKOUT soniyaga bloklanadi va kod bekor qilinadi
+    "MAX_ATTEMPTS": 5,
+    "LOCKOUT": 900,
+    # Jarayon ichida saqlanadigan kalitlar soni
+    "MAX_SIZE": 100_000,
+    # Django CACHES dagi alias. Bir nechta jarayon ishlatilsa umumiy backend bo'lishi kerak
+    "BACKEND": env.str("OTP_THROTTLE_CACHE_BACKEND", default=None),
+}
+
+COMPANY_TOKEN_CACHE = {
+    "MAX_SIZE": env.int("COMPANY_TOKEN_CACHE_SIZE", default=1024),
+    "TTL": env.int("COMPANY_TOKEN_CACHE_TTL", default=300),
+    # Django CACHES dagi alias, masalan "default". None bo'lsa faqat jarayon ichidagi kesh ishlatiladi
+    "BACKEND": env.str("COMPANY_TOKEN_CACHE_BACKEND", default=None),
 }
 
+EVENTS = {
+    # InMemoryBroker faqat jarayon ichida ishlaydi: WSGI workerlaridagi o'zgarishlar ASGI obunachilariga yetmaydi.
+    # WSGI va ASGI birga yoki bir nechta jarayon ishlatilsa umumiy pub/sub backend bilan almashtiriladi
+    "BROKER": env.str("EVENTS_BROKER", default="project.events.InMemoryBroker"),
+    "QUEUE_SIZE": 100,
+    # SSE ulanishini tirik saqlash uchun ping oralig'i (soniya)
+    "HEARTBEAT": 15,
+}
+
+TELEGRAM_CLIENT = {
+    # True bo'lsa xabarlar tarmoqqa chiqmaydi (oflayn testlar uchun)
+    "STUB": env.bool("TELEGRAM_STUB", default=False),
+    "POOL_CONNECTIONS": env.int("TELEGRAM_POOL_CONNECTIONS", default=4),
+    "POOL_MAXSIZE": env.int("TELEGRAM_POOL_MAXSIZE", default=16),
+    "TIMEOUT": 10,
+    # Telegram limitlari: umumiy 30 xabar/soniya, guruhga 20 xabar/daqiqa, shaxsiy chatga 1 xabar/soniya
+    "GLOBAL_RATE": 30,
+    "GROUP_RATE": 20 / 60,
+    "PRIVATE_RATE": 1,
+}
+
+OUTBOUND_MESSAGES = {
+    # Testlar uchun "project.messaging.LocalTransport"
+    "TRANSPORT": env.str("OUTBOUND_MESSAGE_TRANSPORT", default="project.messaging.TelegramTransport"),
+    # 0 bo'lsa xabarlar faqat `send_outbound_messages` buyrug'i orqali yuboriladi
+    "WORKERS": env.int("OUTBOUND_MESSAGE_WORKERS", default=2),
+    "BATCH_SIZE": 20,
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF": 2,
+}
+
+# ASGI uchun config.asgi_settings da "config.asgi_urls"
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -109,11 +201,87 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": env.str("DB_ENGINE", default="django.db.backends.sqlite3"),
+        "NAME": env.str("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+        "USER": env.str("DB_USER", default=""),
+        "PASSWORD": env.str("DB_PASSWORD", default=""),
+        "HOST": env.str("DB_HOST", default=""),
+        "PORT": env.str("DB_PORT", default=""),
+        # Doimiy ulanishlar (soniya, 0 - har so'rovdan keyin yopiladi). Qayta ishlatishdan oldin tekshiriladi.
+        # Faqat WSGI uchun: config.asgi_settings da o'chiriladi (ASGI da har bir thread o'z ulanishini ochiq qoldiradi)
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
+        "CONN_HEALTH_CHECKS": env.bool("DB_CONN_HEALTH_CHECKS", default=True),
+        "OPTIONS": {},
     }
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["OPTIONS"] = {
+        # Qulf bo'shashini kutish (soniya)
+        "timeout": env.int("SQLITE_TIMEOUT", default=20),
+        # Yozuvchi tranzaksiya boshidanoq qulf oladi, o'qishdan yozishga o'tishdagi "database is locked" bo'lmaydi
+        "transaction_mode": "IMMEDIATE",
+    }
+elif env.bool("DB_POOL", default=False):
+    # PostgreSQL (psycopg 3) ulanishlar puli. Pul bilan doimiy ulanishlar ishlatilmaydi
+    DATABASES["default"]["OPTIONS"] = {"pool": {"min_size": env.int("DB_POOL_MIN_SIZE", default=2), "max_size": env.int("DB_POOL_MAX_SIZE", default=10)}}
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+# Faqat o'qish uchun replika (masalan LiteFS/Litestream nusxasi yoki PostgreSQL replikasi). Berilmasa hammasi default da
+if env.str("DB_REPLICA_NAME", default=None):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": env.str("DB_REPLICA_NAME"),
+        "HOST": env.str("DB_REPLICA_HOST", default=DATABASES["default"]["HOST"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["project.db.ReplicaRouter"]
+
+DATABASE_REPLICA = {
+    "PRIMARY": "default",
+    # None - replika yo'q, hamma so'rovlar asosiy bazada
+    "REPLICA": "replica" if "replica" in DATABASES else None,
+    # Yozgan mijozning o'qishlari shuncha soniya asosiy bazadan (replika kechikishidan katta bo'lishi kerak)
+    "PIN_SECONDS": env.int("DB_REPLICA_PIN_SECONDS", default=5),
+    # Bir nechta jarayon ishlatilsa umumiy backend bo'lishi kerak
+    "CACHE": env.str("DB_REPLICA_PIN_CACHE", default="default"),
+}
+
+# Har bir yangi SQLite ulanishida bajariladi (project.signals.configure_connection)
+SQLITE_PRAGMAS = {
+    "journal_mode": env.str("SQLITE_JOURNAL_MODE", default="WAL"),
+    # WAL bilan xavfsiz: elektr uzilsa oxirgi tranzaksiyalar yo'qolishi mumkin, baza buzilmaydi
+    "synchronous": env.str("SQLITE_SYNCHRONOUS", default="NORMAL"),
+    "mmap_size": env.int("SQLITE_MMAP_SIZE", default=128 * 1024 * 1024),
+    "busy_timeout": env.int("SQLITE_BUSY_TIMEOUT", default=20000),
+    "temp_store": "MEMORY",
+}
+
+NEWS_FEED_CACHE_BACKEND = env.str("NEWS_FEED_CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Yangiliklar lentasi sahifalari. locmem har bir workerda alohida (boshqa workerdagi yozish TIMEOUT tugaguncha
+    # ko'rinmaydi), bir nechta worker bo'lsa fayl (django.core.cache.backends.filebased.FileBasedCache)
+    # yoki umumiy backend ishlatiladi
+    "news_feed": {
+        "BACKEND": NEWS_FEED_CACHE_BACKEND,
+        "LOCATION": env.str("NEWS_FEED_CACHE_LOCATION", default="news-feed"),
+        "TIMEOUT": env.int("NEWS_FEED_CACHE_TIMEOUT", default=5 * 60 if NEWS_FEED_CACHE_BACKEND.endswith("LocMemCache") else 24 * 60 * 60),
+    },
+}
+
+NEWS_FEED = {
+    "CACHE": "news_feed",
+    # Yozishdan keyin shu sahifalar oldindan tayyorlab qo'yiladi
+    "WARM_PAGES": env.int("NEWS_FEED_WARM_PAGES", default=1),
+    # False bo'lsa sahifalar tranzaksiya tugashi bilan shu threadda tayyorlanadi
+    "ASYNC": env.bool("NEWS_FEED_ASYNC", default=True),
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     # {
@@ -144,9 +312,22 @@ STATIC_URL = "static/"
 STATIC_ROOT = "static_files"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Bir so'rovda bir nechta so'rov va ularning rasmlari yuklanadi (requests/bulk_create)
+DATA_UPLOAD_MAX_NUMBER_FILES = env.int("DATA_UPLOAD_MAX_NUMBER_FILES", default=1000)
+
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+IMAGE_VARIANTS = {
+    # Eng uzun tomon bo'yicha o'lchamlar (px)
+    "SIZES": [320, 768, 1280],
+    "FORMAT": env.str("IMAGE_VARIANTS_FORMAT", default="WEBP"),
+    "QUALITY": 80,
+    # False bo'lsa nusxalar tranzaksiya tugashi bilan shu threadda yaratiladi
+    "ASYNC": env.bool("IMAGE_VARIANTS_ASYNC", default=True),
+    "WORKERS": 2,
+}
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "project.Employee"
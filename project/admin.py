@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import OTP, Company, CompanyToken, CompanyType, Department, Employee, News, Request, RequestImage
+from .models import OTP, Company, CompanyToken, CompanyType, Department, Employee, News, OutboundMessage, Request, RequestImage
 
 
 @admin.register(Employee)
@@ -69,12 +69,9 @@ class OTPAdmin(admin.ModelAdmin):
 
     @admin.action(description="Clear expired OTPs")
     def clear_expired_otp(self, request, queryset):
-        expired_items = [obj for obj in queryset if obj.is_expired()]
+        deleted, _ = queryset.expired().delete()
 
-        for obj in expired_items:
-            obj.delete()
-
-        self.message_user(request, f"{len(expired_items)} expired OTPs have been cleared.")
+        self.message_user(request, f"{deleted} expired OTPs have been cleared.")
 
 
 @admin.register(Department)
@@ -95,3 +92,9 @@ class CompanyTokenAdmin(admin.ModelAdmin):
 @admin.register(CompanyType)
 class CompanyTypeAdmin(admin.ModelAdmin):
     list_display = ["pk", "name"]
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ["pk", "chat_id", "status", "attempts", "created_at", "sent_at"]
+    list_filter = ["status"]
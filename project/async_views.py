@@ -0,0 +1,157 @@
+"""
+CompanyAuthenticationViewSet dagi autentifikatsiya oqimining async variantlari.
+
+Django async ORM ishlatiladi va OTP xabari joriy event loopda yuboriladi, shuning uchun bitta ASGI worker
+bir vaqtda yuzlab OTP so'rovlarini kutib turishi mumkin. `config.asgi_urls` orqali ASGI da bir xil URL larga ulanadi.
+"""
+
+import asyncio
+import json
+import math
+import random
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied, Throttled
+
+from .messaging import dispatcher
+from .models import OTP, Company, CompanyToken, OutboundMessage
+from .serializers import CompanySerializer, PhoneNumberOTPSerializer, StirAuthenticationSerializer
+from .throttling import get_idents, otp_limiter
+from .utils import otp_message
+
+_background_tasks = set()
+
+
+def get_request_data(request):
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+
+    return request.POST
+
+
+async def throttle(action, request, data):
+    """
+    OTPRateThrottle ning async viewlar uchun varianti. Cheklovdan oshsa 429 javob qaytaradi.
+    """
+    # Umumiy cache backend bloklovchi, event loop to'xtamasligi uchun threadda
+    wait = await sync_to_async(otp_limiter.check)(action, get_idents(request, data))
+
+    if wait is None:
+        return None
+
+    return JsonResponse({"detail": Throttled(wait).detail}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={"Retry-After": str(math.ceil(wait))})
+
+
+def run_in_background(coroutine):
+    # Task garbage collector tomonidan yo'qotilmasligi uchun havola saqlanadi
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def deliver_otp(message):
+    if not await dispatcher.adeliver(message):
+        dispatcher.wake()
+
+
+@sync_to_async
+def save_otp(company, code):
+    """
+    OTP va yuboriladigan xabarni bitta tranzaksiyada yozadi (async ORM tranzaksiyalarni qo'llab-quvvatlamaydi).
+    """
+    with transaction.atomic():
+        OTP.objects.issue(company, code)
+        return OutboundMessage.objects.create(chat_id=settings.OTP_CHAT_ID, thread_id=settings.OTP_THREAD_ID, text=otp_message(company.phone_number, code))
+
+
+@csrf_exempt
+@require_POST
+async def send_otp(request):
+    data = get_request_data(request)
+
+    if response := await throttle("send_otp", request, data):
+        return response
+
+    serializer = StirAuthenticationSerializer(data=data)
+
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    company = await Company.objects.filter(stir=serializer.validated_data["stir"]).afirst()
+
+    if company is None:
+        return JsonResponse({"detail": "No Company matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+
+    if not company.phone_number:
+        return JsonResponse({"message": "Kompaniyaga telefon raqam biriktirilmagan"}, status=status.HTTP_400_BAD_REQUEST)
+
+    message = await save_otp(company, str(random.randint(100000, 999999)))
+    run_in_background(deliver_otp(message))
+
+    return JsonResponse({"message": "Tasdiqlash kodi muvaffaqqiyatli yuborildi", "phone": company.phone_number}, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_POST
+async def verify_otp(request):
+    data = get_request_data(request)
+
+    if response := await throttle("verify_otp", request, data):
+        return response
+
+    serializer = PhoneNumberOTPSerializer(data=data)
+
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    phone_number, code = serializer.validated_data["phone_number"], serializer.validated_data["otp"]
+
+    company = await Company.objects.select_related("department", "company_type").filter(phone_number=phone_number).afirst()
+
+    if company is None:
+        await sync_to_async(otp_limiter.verify_failed)(phone_number)
+        return JsonResponse({"detail": "Telefon raqami yoki OTP kodi noto'g'ri."}, status=status.HTTP_400_BAD_REQUEST)
+
+    deleted, _ = await OTP.objects.active().filter(company=company, code=code).adelete()
+
+    if not deleted:
+        expired = await OTP.objects.filter(company=company, code=code).aexists()
+
+        if await sync_to_async(otp_limiter.verify_failed)(phone_number):
+            await OTP.objects.filter(company=company).adelete()
+
+        if expired:
+            return JsonResponse({"detail": "OTP kodi muddati tugagan."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return JsonResponse({"detail": "Telefon raqami yoki OTP kodi noto'g'ri."}, status=status.HTTP_400_BAD_REQUEST)
+
+    await sync_to_async(otp_limiter.verify_succeeded)(phone_number)
+    token, created = await CompanyToken.objects.aget_or_create(company=company)
+
+    return JsonResponse(
+        {
+            "token": token.key,
+            "company": CompanySerializer(company, context={"request": request}).data,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@require_GET
+async def get_me(request):
+    if not request.company:
+        # WSGI dagi CompanyIsAuthenticated kabi (autentifikatsiya klasslari yo'q, shuning uchun 401 emas)
+        return JsonResponse({"detail": PermissionDenied().detail}, status=status.HTTP_403_FORBIDDEN)
+
+    # Token keshi kompaniyani bo'lim va turi bilan birga yuklaydi, qo'shimcha so'rov kerak emas
+    return JsonResponse(CompanySerializer(request.company).data, status=status.HTTP_200_OK)
@@ -0,0 +1,182 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from rest_framework.test import APIClient
+
+from .models import OTP, Company, CompanyToken, CompanyType, Department, Employee, News, Request, RequestImage
+from .profiling import QueryCollector, percentile
+from .search import SEARCH_INDEXES
+from .stats import rebuild_counters
+from .throttling import otp_limiter
+
+DEFAULT_VOLUMES = {
+    "departments": 10,
+    "companies": 1000,
+    "employees": 200,
+    "requests": 5000,
+    "images_per_request": 2,
+    "news": 200,
+}
+
+STATUSES = ["pending", "accepted", "rejected", "on_going"]
+
+
+def seed(volumes, random_seed=42, batch_size=2000):
+    """
+    Benchmark uchun ma'lumotlar bazasini to'ldiradi. Bir xil `random_seed` bir xil ma'lumot beradi.
+    """
+    rng = random.Random(random_seed)
+
+    departments = Department.objects.bulk_create(
+        [Department(name=f"Bo'lim {i}", region=f"Viloyat {i % 14}", district=f"Tuman {i}") for i in range(volumes["departments"])]
+    )
+    company_types = CompanyType.objects.bulk_create([CompanyType(name=name) for name in ("MChJ", "AJ", "XK", "YaTT")])
+
+    companies = Company.objects.bulk_create(
+        [
+            Company(
+                department=rng.choice(departments),
+                company_type=rng.choice(company_types),
+                name=f"Kompaniya {i}",
+                stir=f"{300000000 + i}",
+                phone_number=f"+99890{i:07d}",
+                status="active",
+                region="Toshkent",
+                district="Chilonzor",
+            )
+            for i in range(volumes["companies"])
+        ],
+        batch_size=batch_size,
+    )
+
+    password = make_password("benchmark")
+    employees = Employee.objects.bulk_create(
+        [
+            Employee(
+                phone_number=f"+99891{i:07d}",
+                password=password,
+                first_name=f"Xodim {i}",
+                last_name="Benchmark",
+                region="Toshkent",
+                district="Chilonzor",
+                role=rng.choice(["director", "manager", "employee"]),
+                department=rng.choice(departments),
+                is_staff=i == 0,
+            )
+            for i in range(volumes["employees"])
+        ],
+        batch_size=batch_size,
+    )
+
+    requests = []
+    for i in range(volumes["requests"]):
+        request = Request(
+            company=rng.choice(companies),
+            uploader=rng.choice(employees),
+            performer=rng.choice(employees) if rng.random() < 0.6 else None,
+            priority=rng.randint(1, 5),
+            description=f"So'rov {i} tavsifi",
+            lat=41.2 + rng.random() * 0.2,
+            long=69.1 + rng.random() * 0.3,
+            status=rng.choice(STATUSES),
+        )
+        request.update_geohash()
+        requests.append(request)
+
+    requests = Request.objects.bulk_create(requests, batch_size=batch_size)
+
+    RequestImage.objects.bulk_create(
+        [RequestImage(request=request, image=f"request-images/{request.pk}-{j}.jpg") for request in requests for j in range(volumes["images_per_request"])],
+        batch_size=batch_size,
+    )
+    News.objects.bulk_create(
+        [News(department=rng.choice(departments), title=f"Yangilik {i}", description="Yangilik matni " * 20) for i in range(volumes["news"])],
+        batch_size=batch_size,
+    )
+
+    # bulk_create signallarni chaqirmaydi
+    for index in SEARCH_INDEXES.values():
+        index.rebuild()
+    rebuild_counters()
+
+    return {"staff": employees[0], "company": companies[0]}
+
+
+def measure(call, iterations, warmup=3, before=None):
+    """
+    `call()` ni bir necha marta bajarib vaqt, SQL so'rovlar soni va javob hajmini o'lchaydi.
+    """
+    for _ in range(warmup):
+        if before:
+            before()
+        call()
+
+    durations, queries, sizes = [], [], []
+
+    for _ in range(iterations):
+        if before:
+            before()
+
+        collector = QueryCollector()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+
+            started = time.perf_counter()
+            response = call()
+            durations.append(time.perf_counter() - started)
+
+        assert response.status_code < 400, f"{response.status_code}: {response.content[:200]!r}"
+        queries.append(collector.count)
+        sizes.append(len(response.content))
+
+    total = sum(durations)
+    milliseconds = [duration * 1000 for duration in durations]
+
+    return {
+        "iterations": iterations,
+        "mean_ms": round(total * 1000 / iterations, 3),
+        "p50_ms": round(percentile(milliseconds, 0.5), 3),
+        "p90_ms": round(percentile(milliseconds, 0.9), 3),
+        "p99_ms": round(percentile(milliseconds, 0.99), 3),
+        "throughput_rps": round(iterations / total, 1) if total else None,
+        "queries": max(queries),
+        "response_bytes": max(sizes),
+    }
+
+
+def get_scenarios(fixtures, page_size):
+    """
+    Benchmark qilinadigan endpointlar: nom -> (call, before).
+    """
+    staff = APIClient()
+    staff.force_authenticate(fixtures["staff"])
+
+    company = fixtures["company"]
+    token = CompanyToken.objects.get_or_create(company=company)[0]
+    company_client = APIClient(HTTP_AUTHORIZATION=f"Token {token.key}")
+    anonymous = APIClient()
+
+    def reset_otp():
+        # Bitta mijozdan ketma-ket so'rovlar IP cheklovidan oshadi
+        otp_limiter.clear()
+        OTP.objects.issue(company, "123456")
+
+    return {
+        "requests-list": (lambda: staff.get(f"/api/requests/?page_size={page_size}"), None),
+        "requests-list-sparse": (lambda: staff.get(f"/api/requests/?page_size={page_size}&fields=id,status,priority,company&expand="), None),
+        "companies-list": (lambda: staff.get(f"/api/companies/?page_size={page_size}"), None),
+        "news-list": (lambda: staff.get(f"/api/news/?page_size={page_size}"), None),
+        "requests-stats": (lambda: staff.get("/api/requests/stats/"), None),
+        "companies-search": (lambda: staff.get(f"/api/companies/?q=kompaniya 12&page_size={page_size}"), None),
+        "requests-search": (lambda: staff.get(f"/api/requests/?q=so'rov 4&page_size={page_size}"), None),
+        "company-auth-requests": (lambda: company_client.get("/api/company-auth/requests/"), None),
+        "company-auth-verify-otp": (
+            lambda: anonymous.post("/api/company-auth/verify_otp/", {"phone_number": company.phone_number, "otp": 123456}),
+            reset_otp,
+        ),
+    }
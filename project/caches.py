@@ -0,0 +1,172 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Company, CompanyToken
+
+_MISSING = object()
+_NO_COMPANY = "__no_company__"
+
+
+class LRUCache:
+    """
+    Jarayon ichidagi, threadlar uchun xavfsiz LRU kesh. Har bir yozuv `ttl` soniyadan keyin eskiradi.
+    """
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+
+            if item is _MISSING:
+                return default
+
+            value, expires_at = item
+
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CompanyTokenCache:
+    """
+    Token kalitidan kompaniyani topish uchun kesh.
+
+    Birinchi daraja - jarayon ichidagi LRU, ikkinchi daraja - ixtiyoriy Django cache backend.
+    Mavjud bo'lmagan tokenlar ham keshlanadi, shuning uchun yaroqsiz kalitlar bazaga qayta tushmaydi.
+    """
+
+    key_prefix = "company-token:"
+
+    def __init__(self, max_size=1024, ttl=300, backend=None):
+        self.local = LRUCache(max_size=max_size, ttl=ttl)
+        self.ttl = ttl
+        self.backend_alias = backend
+        self.hits = 0
+        self.misses = 0
+        self._company_keys = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return caches[self.backend_alias] if self.backend_alias else None
+
+    def get_company(self, key):
+        company = self.local.get(key, _MISSING)
+
+        if company is _MISSING and self.backend is not None:
+            company = self.backend.get(self.key_prefix + key, _MISSING)
+
+            if company is not _MISSING:
+                self._remember(key, company)
+
+        if company is _MISSING:
+            self._count(hit=False)
+            company = self._load(key)
+            self._remember(key, company)
+
+            if self.backend is not None:
+                self.backend.set(self.key_prefix + key, company, self.ttl)
+        else:
+            self._count(hit=True)
+
+        if company == _NO_COMPANY:
+            return None
+
+        # Har bir so'rov o'z nusxasini oladi, keshdagi obyekt o'zgarmasligi uchun
+        return copy.copy(company)
+
+    def invalidate(self, key):
+        self.local.delete(key)
+
+        if self.backend is not None:
+            self.backend.delete(self.key_prefix + key)
+
+    def invalidate_company(self, company_id):
+        self.invalidate_companies([company_id])
+
+    def invalidate_companies(self, company_ids):
+        keys = set()
+
+        with self._lock:
+            for company_id in company_ids:
+                keys |= self._company_keys.pop(company_id, set())
+
+        if self.backend is not None:
+            keys |= set(CompanyToken.objects.filter(company_id__in=company_ids).values_list("key", flat=True))
+
+        for key in keys:
+            self.invalidate(key)
+
+    def clear(self):
+        self.local.clear()
+
+        with self._lock:
+            self._company_keys.clear()
+
+        self.hits = self.misses = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.local)}
+
+    def _load(self, key):
+        token = CompanyToken.objects.select_related("company__department", "company__company_type").filter(key=key).first()
+        return token.company if token else _NO_COMPANY
+
+    def _remember(self, key, company):
+        self.local.set(key, company)
+
+        if isinstance(company, Company):
+            with self._lock:
+                self._company_keys.setdefault(company.pk, set()).add(key)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+def _build_company_token_cache():
+    options = getattr(settings, "COMPANY_TOKEN_CACHE", {})
+
+    return CompanyTokenCache(
+        max_size=options.get("MAX_SIZE", 1024),
+        ttl=options.get("TTL", 300),
+        backend=options.get("BACKEND"),
+    )
+
+
+company_token_cache = _build_company_token_cache()
@@ -0,0 +1,79 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    ModelViewSet uchun shartli GET (If-None-Match / If-Modified-Since).
+
+    Ro'yxat ETag i so'rov parametrlari (sahifa, filtrlar), filtrlangan queryset dagi eng katta `updated_at` va
+    yozuvlar sonidan olinadi. Obyekt ETag i va Last-Modified esa uning `updated_at` idan olinadi.
+    O'zgarmagan bo'lsa 304 qaytadi, serializer ishlamaydi. Ichki bog'langan obyektlar (masalan so'rovdagi
+    kompaniya) o'zgarishi ETag ga ta'sir qilmaydi.
+    """
+
+    updated_field = "updated_at"
+
+    def get_etag_parts(self):
+        # Turli formatdagi javoblar (JSON, browsable API, ...) bir xil ETag olmasligi uchun
+        return [self.queryset.model._meta.label, self.request.accepted_media_type]
+
+    def get_list_summary(self, queryset=None):
+        """
+        Filtrlangan ro'yxat holati: (yozuvlar soni, eng katta `updated_at`). Bitta so'rov.
+        """
+        queryset = self.filter_queryset(self.get_queryset()) if queryset is None else queryset
+        summary = queryset.order_by().aggregate(last=Max(self.updated_field), count=Count("pk"))
+        return summary["count"], summary["last"] and summary["last"].isoformat()
+
+    def get_list_etag(self, summary):
+        # Sahifa va tartib parametrlari queryset ga ta'sir qilmasa ham javob boshqa
+        query = sorted((key, sorted(values)) for key, values in self.request.query_params.lists())
+        return make_etag(*self.get_etag_parts(), query, *summary)
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(self.get_list_summary())
+
+        return self.conditional_response(request, etag, None, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+
+        try:
+            updated_at = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}).values_list(self.updated_field, flat=True).first()
+        except (TypeError, ValueError, ValidationError):
+            # Noto'g'ri formatdagi kalit (masalan /api/requests/abc/)
+            raise Http404
+
+        if updated_at is None:
+            # 404 va ruxsatlar odatdagidek
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = make_etag(*self.get_etag_parts(), self.kwargs[lookup_url_kwarg], updated_at.isoformat())
+
+        return self.conditional_response(request, etag, updated_at, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+    def conditional_response(self, request, etag, last_modified, get_response):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+        if response is None:
+            response = get_response()
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+
+        return response
@@ -0,0 +1,102 @@
+import hashlib
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Joriy HTTP so'rov holati (ReplicaPinMiddleware o'rnatadi)
+_request_state = ContextVar("db_request_state", default=None)
+
+# Ma'lumotni o'zgartiradigan SQL buyruqlari
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def apply_sqlite_pragmas(connection):
+    """
+    `SQLITE_PRAGMAS` ni yangi ulanishga qo'llaydi (WAL, synchronous, mmap, busy_timeout, ...).
+    """
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            # PRAGMA parametr qabul qilmaydi, qiymatlar faqat sozlamalardan keladi
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def track_writes(execute, sql, params, many, context):
+    """
+    `connection.execute_wrapper` uchun: joriy HTTP so'rovda bazaga haqiqatan yozilganini belgilaydi.
+    """
+    state = _request_state.get()
+
+    if state is not None and not state.written and sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        state.written = True
+
+    return execute(sql, params, many, context)
+
+
+def install_write_tracking(connection):
+    # Boshida: `execute_wrapper()` konteksti oxirgi wrapperni olib tashlaydi
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, track_writes)
+
+
+def replica_configured():
+    return settings.DATABASE_REPLICA["REPLICA"] is not None
+
+
+class RequestState:
+    def __init__(self, pinned=False):
+        # True bo'lsa o'qishlar ham asosiy bazadan
+        self.pinned = pinned
+        self.written = False
+
+
+def start_request(pinned):
+    state = RequestState(pinned)
+    _request_state.set(state)
+    return state
+
+
+def end_request():
+    _request_state.set(None)
+
+
+def get_pin_key(request):
+    """
+    Mijozni ajratish: avtorizatsiya sarlavhasi, sessiya yoki IP manzil.
+    """
+    credentials = (
+        request.META.get("HTTP_AUTHORIZATION")
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get("REMOTE_ADDR", "")
+    )
+    return "db-pin:" + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+class ReplicaRouter:
+    """
+    O'qish so'rovlarini replikaga, yozishni asosiy bazaga yo'naltiradi. Replika sozlanmagan bo'lsa hamma narsa asosiy bazada.
+
+    Asosiy bazadan o'qiladi: tranzaksiya ichida, yozuvchi HTTP so'rovda va yaqinda yozgan mijozning
+    so'rovlarida (`DATABASE_REPLICA["PIN_SECONDS"]`, replika kechikishi uchun).
+    """
+
+    def db_for_read(self, model, **hints):
+        options = settings.DATABASE_REPLICA
+        state = _request_state.get()
+
+        if not replica_configured() or connections[options["PRIMARY"]].in_atomic_block or (state is not None and state.pinned):
+            return options["PRIMARY"]
+
+        return options["REPLICA"]
+
+    def db_for_write(self, model, **hints):
+        # Faqat yo'naltirish: ba'zi o'qishlar ham asosiy bazani so'raydi, yozish `track_writes` da belgilanadi
+        return settings.DATABASE_REPLICA["PRIMARY"]
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ikkala baza bir xil ma'lumotga ega
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replika sxemasi asosiy bazadan ko'chiriladi
+        return db != settings.DATABASE_REPLICA["REPLICA"]
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    Bitta SSE ulanishi uchun navbat. Hodisalar boshqa threadlardan ham xavfsiz qo'shiladi.
+    """
+
+    def __init__(self, broker, channels, loop, queue_size=100):
+        self.broker = broker
+        self.channels = set(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def push(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Event loop yopilgan - ulanish allaqachon uzilgan
+            self.close()
+
+    def _put(self, event):
+        if self.queue.full():
+            # Sekin mijoz: eng eski hodisa tashlab yuboriladi
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker(ABC):
+    @abstractmethod
+    def subscribe(self, channels) -> Subscription:
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, subscription):
+        pass
+
+    @abstractmethod
+    def publish(self, channel, event):
+        pass
+
+
+class InMemoryBroker(BaseBroker):
+    """
+    Jarayon ichidagi pub/sub: faqat shu jarayonda publish qilingan hodisalar yetkaziladi. So'rov WSGI workerida
+    o'zgarsa (signals.request_saved), hodisa ASGI jarayonidagi SSE obunachilariga yetib bormaydi. WSGI va ASGI birga
+    yoki bir nechta jarayon ishlatilsa umumiy backend (masalan Redis) bilan almashtiriladi.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels, asyncio.get_running_loop(), self.queue_size)
+
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].discard(subscription)
+
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for subscription in subscribers:
+            subscription.push(event)
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def company_channel(company_id):
+    return f"company:{company_id}"
+
+
+def employee_channel(employee_id):
+    return f"employee:{employee_id}"
+
+
+ALL_REQUESTS_CHANNEL = "requests:all"
+
+
+def publish_request_change(request, changes):
+    """
+    So'rov holati yoki ijrochisi o'zgarganini egasi bo'lgan kompaniya va tegishli xodimlarga yuboradi.
+    """
+    event = {
+        "type": "request.updated",
+        "request": request.pk,
+        "status": request.status,
+        "performer": request.performer_id,
+        "changes": changes,
+    }
+
+    channels = {company_channel(request.company_id), ALL_REQUESTS_CHANNEL}
+    employees = {request.uploader_id, request.performer_id, changes.get("performer", {}).get("old")}
+    channels |= {employee_channel(employee_id) for employee_id in employees if employee_id}
+
+    for channel in channels:
+        broker.publish(channel, event)
+
+
+def _build_broker():
+    options = settings.EVENTS
+    return import_string(options["BROKER"])(queue_size=options.get("QUEUE_SIZE", 100))
+
+
+broker = _build_broker()
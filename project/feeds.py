@@ -0,0 +1,96 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+ALL_DEPARTMENTS = "all"
+
+
+class NewsFeedCache:
+    """
+    Bo'limlar bo'yicha yangiliklar lentasi sahifalari uchun kesh.
+
+    Har bir bo'lim (va umumiy lenta) o'z versiya hisoblagichiga ega. Yangilik yozilganda versiya oshadi,
+    eski sahifalar kalitlari boshqa ishlatilmaydi va TIMEOUT tugagach o'chib ketadi. Keshdan o'qishda bazaga
+    so'rov yo'q.
+
+    Versiya jarayon ichidagi keshda (locmem) faqat yozgan workerda oshadi, boshqa workerlar eski sahifani TIMEOUT
+    tugaguncha berishi mumkin. Bir nechta worker bo'lsa umumiy (fayl yoki tarmoq) kesh ishlatiladi.
+    """
+
+    key_prefix = "news-feed"
+
+    def __init__(self, alias="news_feed", warm_pages=1, background=True):
+        self.alias = alias
+        self.warm_pages = warm_pages
+        self.background = background
+        self._executor = None
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version_key(self, department):
+        return f"{self.key_prefix}:version:{department}"
+
+    def get_version(self, department):
+        key = self.version_key(department)
+        version = self.cache.get(key)
+
+        if version is None:
+            self.cache.add(key, 1, timeout=None)
+            version = self.cache.get(key, 1)
+
+        return version
+
+    def bump(self, department):
+        key = self.version_key(department)
+
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Kalit yo'q (kesh tozalangan yoki birinchi yozish)
+            self.cache.add(key, 1, timeout=None)
+            return self.cache.incr(key)
+
+    def page_key(self, department, version, origin, page, page_size):
+        return f"{self.key_prefix}:{department}:{version}:{origin}:{page}:{page_size}"
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, data):
+        self.cache.set(key, data)
+
+    def schedule_warm(self, warm):
+        """
+        `warm` ni tranzaksiya tugagach fon threadida ishga tushiradi, yozish so'rovi sahifalar tayyorlanishini kutmaydi.
+        """
+        if not self.background:
+            transaction.on_commit(warm)
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="news-feed")
+
+        transaction.on_commit(lambda: self._executor.submit(self._warm_in_background, warm))
+
+    def _warm_in_background(self, warm):
+        try:
+            warm()
+        except Exception:
+            logger.exception("News feed warmup failed")
+        finally:
+            close_old_connections()
+
+
+def _build_news_feed_cache():
+    options = getattr(settings, "NEWS_FEED", {})
+    return NewsFeedCache(alias=options.get("CACHE", "news_feed"), warm_pages=options.get("WARM_PAGES", 1), background=options.get("ASYNC", True))
+
+
+news_feed_cache = _build_news_feed_cache()
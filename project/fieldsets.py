@@ -0,0 +1,155 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+_FROM_REQUEST = object()
+
+
+def parse_tree(value):
+    """
+    "id,company.name,company.department" -> {"id": {}, "company": {"name": {}, "department": {}}}
+    """
+    tree = {}
+
+    for path in value.split(","):
+        node = tree
+
+        for part in filter(None, (part.strip() for part in path.split("."))):
+            node = node.setdefault(part, {})
+
+    return tree
+
+
+def get_field_spec(request):
+    """
+    So'rovdagi `?fields=` va `?expand=` daraxtlari. Berilmagan parametr uchun None.
+    """
+    if request is None:
+        return None, None
+
+    params = getattr(request, "query_params", request.GET)
+    fields, expand = params.get("fields"), params.get("expand")
+
+    return (parse_tree(fields) if fields is not None else None), (parse_tree(expand) if expand is not None else None)
+
+
+class DynamicFieldsMixin:
+    """
+    ModelSerializer uchun `?fields=` (qaysi maydonlar) va `?expand=` (qaysi bog'lanishlar obyekt sifatida) boshqaruvi.
+
+    Kengaytirilmagan bog'lanishlar faqat `id` bo'lib chiqadi. `?expand=` berilmasa `default_expand` ishlatiladi,
+    berilsa aynan u (ichma-ich yo'llar nuqta bilan: `company.department`). Maydonlar faqat o'qishda qisqartiriladi.
+    """
+
+    # Maydon nomi -> ichki serializer. Maydonning o'zi id qaytarishi kerak (PrimaryKeyRelatedField)
+    expandable_fields = {}
+    default_expand = ()
+
+    def __init__(self, *args, fields=_FROM_REQUEST, expand=_FROM_REQUEST, exclude_fields=(), **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get("request")
+
+        if fields is _FROM_REQUEST and expand is _FROM_REQUEST:
+            fields, expand = get_field_spec(request)
+        fields = None if fields is _FROM_REQUEST else fields
+        expand = None if expand is _FROM_REQUEST else expand
+
+        self.fields_tree = fields or None
+        self.expand_tree = expand
+
+        if request is not None and request.method not in SAFE_METHODS:
+            self.fields_tree = None
+
+        for name in list(self.fields):
+            if name in exclude_fields or (self.fields_tree is not None and name not in self.fields_tree):
+                self.fields.pop(name)
+
+    def is_expanded(self, name):
+        return name in self.expand_tree if self.expand_tree is not None else name in self.default_expand
+
+    def wants(self, name):
+        return self.fields_tree is None or name in self.fields_tree
+
+    def get_nested_serializer(self, name, instance=None):
+        return self.expandable_fields[name](
+            instance,
+            context=self.context,
+            fields=(self.fields_tree or {}).get(name) or None,
+            expand=self.expand_tree.get(name, {}) if self.expand_tree is not None else None,
+        )
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+
+        for name in self.expandable_fields:
+            if name in data and self.is_expanded(name):
+                related = getattr(instance, name)
+                data[name] = None if related is None else self.get_nested_serializer(name, related).data
+
+        return data
+
+    def get_query_plan(self, prefix=""):
+        """
+        Kerakli ustunlar (`only`), `select_related` va `prefetch_related` ro'yxatlari. Aniqlab bo'lmasa None.
+        """
+        model = self.Meta.model
+        columns, related, prefetches = [], [], []
+
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+
+            if field.source == "*":
+                return None
+
+            try:
+                model_field = model._meta.get_field(field.source.split(".")[0])
+            except FieldDoesNotExist:
+                continue
+
+            if not model_field.concrete:
+                continue
+
+            columns.append(prefix + model_field.name)
+
+            if model_field.is_relation and name in self.expandable_fields and self.is_expanded(name):
+                nested = self.get_nested_serializer(name).get_query_plan(f"{prefix}{model_field.name}__")
+
+                if nested is None:
+                    return None
+
+                related.append(prefix + model_field.name)
+                columns += nested[0]
+                related += nested[1]
+                prefetches += nested[2]
+
+        return columns, related, prefetches
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None, expand=None, exclude_fields=()):
+        """
+        Serializer chiqaradigan maydonlarga mos ravishda querysetni qisqartiradi: faqat kerakli ustunlar va JOIN lar.
+        """
+        plan = cls(fields=fields, expand=expand, exclude_fields=exclude_fields).get_query_plan()
+
+        if plan is None:
+            return queryset
+
+        columns, related, prefetches = plan
+        return queryset.select_related(*related).prefetch_related(*prefetches).only(*columns)
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet uchun: ro'yxat va bitta obyekt so'rovlarida querysetni `?fields=` / `?expand=` ga moslab qisqartiradi.
+    """
+
+    sparse_actions = ("list", "retrieve")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if self.action not in self.sparse_actions or getattr(self, "swagger_fake_view", False):
+            return queryset
+
+        return self.get_serializer_class().optimize_queryset(queryset, *get_field_spec(self.request))
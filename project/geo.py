@@ -0,0 +1,87 @@
+import math
+
+EARTH_RADIUS = 6371000  # metr
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+MAX_COVERING_CELLS = 16
+
+
+def encode_geohash(lat, long, precision=GEOHASH_PRECISION):
+    lat_range, long_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, bit_count, even = [], 0, 0, True
+
+    while len(geohash) < precision:
+        bounds, value = (long_range, long) if even else (lat_range, lat)
+        middle = (bounds[0] + bounds[1]) / 2
+
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+
+    return "".join(geohash)
+
+
+def cell_size(precision):
+    """
+    Berilgan aniqlikdagi geohash katakchasining (balandlik, kenglik) o'lchami gradusda.
+    """
+    total_bits = precision * 5
+    long_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+
+    return 180 / 2**lat_bits, 360 / 2**long_bits
+
+
+def haversine(lat1, long1, lat2, long2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(long2 - long1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, long, radius):
+    """
+    Markaz va radius (metr) bo'yicha (min_lat, min_long, max_lat, max_long).
+    """
+    d_lat = math.degrees(radius / EARTH_RADIUS)
+    d_long = math.degrees(radius / (EARTH_RADIUS * max(math.cos(math.radians(lat)), 1e-6)))
+
+    return max(lat - d_lat, -90), max(long - d_long, -180), min(lat + d_lat, 90), min(long + d_long, 180)
+
+
+def covering_geohashes(box, max_cells=MAX_COVERING_CELLS):
+    """
+    To'rtburchakni qoplaydigan eng aniq geohash prefikslari (max_cells dan oshmasligi kerak).
+    """
+    min_lat, min_long, max_lat, max_long = box
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        columns = math.floor(max_long / width) - math.floor(min_long / width) + 1
+
+        if rows * columns <= max_cells or precision == 1:
+            break
+
+    prefixes = set()
+
+    for row in range(rows):
+        for column in range(columns):
+            lat = min(min_lat + row * height, max_lat)
+            long = min(min_long + column * width, max_long)
+            prefixes.add(encode_geohash(lat, long, precision))
+
+    prefixes.add(encode_geohash(max_lat, max_long, precision))
+    return sorted(prefixes)
@@ -0,0 +1,182 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from django.utils.timezone import now
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+variants_generated = Signal()
+
+
+def get_options():
+    options = {"SIZES": [320, 768, 1280], "FORMAT": "WEBP", "QUALITY": 80, "ASYNC": True, "WORKERS": 2}
+    options.update(getattr(settings, "IMAGE_VARIANTS", {}))
+
+    if options["FORMAT"] == "WEBP" and not features.check("webp"):
+        options["FORMAT"] = "JPEG"
+
+    return options
+
+
+def variant_name(name, size, image_format):
+    """
+    request-images/photo.jpg -> request-images/variants/photo_320.webp
+    """
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = "jpg" if image_format == "JPEG" else image_format.lower()
+
+    return posixpath.join(directory, "variants", f"{stem}_{size}.{extension}")
+
+
+def render_variants(field_file, reuse=False):
+    """
+    Original rasmdan har bir o'lcham uchun kichraytirilgan nusxa yaratadi: {o'lcham: fayl nomi}.
+
+    Originaldan katta o'lchamlar yaratilmaydi. `reuse` bo'lsa mavjud nusxalar qayta ishlatiladi (umumiy rasmlar uchun,
+    ularni boshqa yozuvlar ham ishlatadi va o'chirib bo'lmaydi).
+    """
+    options = get_options()
+    storage = field_file.storage
+
+    with storage.open(field_file.name, "rb") as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    if options["FORMAT"] == "JPEG" and original.mode != "RGB":
+        original = original.convert("RGB")
+    elif original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+
+    variants = {}
+
+    for size in sorted(options["SIZES"]):
+        if size >= max(original.size):
+            break
+
+        name = variant_name(field_file.name, size, options["FORMAT"])
+
+        if storage.exists(name):
+            if reuse:
+                variants[str(size)] = name
+                continue
+
+            storage.delete(name)
+
+        image = original.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        buffer = BytesIO()
+        image.save(buffer, format=options["FORMAT"], quality=options["QUALITY"], optimize=True)
+
+        variants[str(size)] = storage.save(name, ContentFile(buffer.getvalue()))
+
+    return variants
+
+
+def is_shared_source(instance, field, name):
+    """
+    Rasm maydonning standart qiymati (masalan images/default-user.png) yoki boshqa yozuvlar ham shu fayldan foydalanadi.
+    """
+    model_field = instance._meta.get_field(field)
+
+    if name == model_field.default:
+        return True
+
+    return type(instance)._default_manager.filter(**{field: name}).exclude(pk=instance.pk).exists()
+
+
+def generate_variants(instance, field="image", variants_field="image_variants"):
+    """
+    Instansiya rasmi uchun nusxalarni yaratadi va faqat `image_variants` ustunini yangilaydi (signallarsiz).
+    """
+    field_file = getattr(instance, field)
+    current = getattr(instance, variants_field) or {}
+
+    if not field_file:
+        variants = {}
+    else:
+        try:
+            variants = {"source": field_file.name, "sizes": render_variants(field_file, reuse=is_shared_source(instance, field, field_file.name))}
+        except (FileNotFoundError, UnidentifiedImageError, OSError) as e:
+            logger.warning("Image variants for %s #%s failed: %s", instance._meta.label, instance.pk, e)
+            variants = {"source": field_file.name, "sizes": {}}
+
+    # Eski nusxalar boshqa yozuvlarda ishlatilmasagina o'chiriladi
+    if current.get("source") and not is_shared_source(instance, field, current["source"]):
+        for size, name in current.get("sizes", {}).items():
+            if name not in variants.get("sizes", {}).values() and field_file.storage.exists(name):
+                field_file.storage.delete(name)
+
+    updates = {variants_field: variants}
+    if any(model_field.name == "updated_at" for model_field in instance._meta.concrete_fields):
+        updates["updated_at"] = now()
+
+    type(instance).objects.filter(pk=instance.pk).update(**updates)
+    setattr(instance, variants_field, variants)
+
+    # update() signal chaqirmaydi, keshlar va bog'liq obyektlar shu signal orqali yangilanadi
+    variants_generated.send(sender=type(instance), instance=instance)
+
+    return variants
+
+
+def needs_variants(instance, field="image", variants_field="image_variants"):
+    field_file = getattr(instance, field)
+    variants = getattr(instance, variants_field) or {}
+
+    return (bool(field_file) and variants.get("source") != field_file.name) or (not field_file and bool(variants))
+
+
+def _generate_in_background(model_label, pk):
+    try:
+        instance = apps.get_model(model_label).objects.filter(pk=pk).first()
+
+        if instance is not None and needs_variants(instance):
+            generate_variants(instance)
+    except Exception:
+        logger.exception("Image variant generation failed for %s #%s", model_label, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance):
+    """
+    Nusxalarni tranzaksiya tugagach, so'rovdan tashqarida (thread poolda) yaratadi.
+    """
+    global _executor
+    options = get_options()
+
+    if not options["ASYNC"]:
+        transaction.on_commit(lambda: generate_variants(instance))
+        return
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=options["WORKERS"], thread_name_prefix="image-variants")
+
+    label, pk = instance._meta.label, instance.pk
+    transaction.on_commit(lambda: _executor.submit(_generate_in_background, label, pk))
+
+
+def variant_urls(variants, request=None):
+    """
+    Serializerlar uchun srcset ko'rinishidagi {o'lcham: URL} lug'ati.
+    """
+    urls = {}
+
+    for size, name in (variants or {}).get("sizes", {}).items():
+        url = default_storage.url(name)
+        urls[size] = request.build_absolute_uri(url) if request else url
+
+    return urls
@@ -0,0 +1,342 @@
+import csv
+import io
+import re
+import zipfile
+from itertools import islice
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.db import transaction
+
+from .caches import company_token_cache
+from .models import Company, CompanyType, Department
+from .search import get_search_index
+from .stats import companies_changed
+
+XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+CELL_COLUMN = re.compile(r"[A-Z]+")
+
+# Ustun sarlavhasi (model maydoni yoki CompanyViewSet eksportidagi nom) -> maydon
+COLUMNS = {
+    "name": "name",
+    "nomi": "name",
+    "stir": "stir",
+    "phone_number": "phone_number",
+    "telefon": "phone_number",
+    "status": "status",
+    "holati": "status",
+    "region": "region",
+    "viloyat": "region",
+    "district": "district",
+    "tuman": "district",
+    "company_type": "company_type",
+    "turi": "company_type",
+    "department": "department",
+    "bo'lim": "department",
+}
+
+# Faylni o'qib bo'lmasa (kodirovka, buzilgan arxiv yoki XML)
+FILE_ERRORS = {
+    UnicodeDecodeError: "Fayl UTF-8 kodirovkasida emas.",
+    csv.Error: "CSV faylni o'qib bo'lmadi.",
+    zipfile.BadZipFile: "Fayl XLSX formatida emas yoki buzilgan.",
+    ParseError: "XLSX fayl tuzilishi buzilgan.",
+}
+
+REQUIRED_FIELDS = ["name", "stir", "status", "region", "district", "company_type", "department"]
+UPDATE_FIELDS = ["name", "phone_number", "status", "region", "district", "company_type", "department", "updated_at"]
+
+
+def iter_csv_rows(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    try:
+        yield from csv.reader(text)
+    finally:
+        # Asl fayl yopilmasin
+        text.detach()
+
+
+def column_index(reference):
+    # "AB12" -> 27
+    index = 0
+
+    for char in CELL_COLUMN.match(reference).group():
+        index = index * 26 + ord(char) - ord("A") + 1
+
+    return index - 1
+
+
+def read_shared_strings(archive):
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+
+    strings = []
+
+    with archive.open("xl/sharedStrings.xml") as file:
+        for event, element in iterparse(file):
+            if element.tag == f"{XLSX_NS}si":
+                strings.append("".join(text.text or "" for text in element.iter(f"{XLSX_NS}t")))
+                element.clear()
+
+    return strings
+
+
+def cell_value(cell, shared_strings):
+    cell_type = cell.get("t")
+
+    if cell_type == "inlineStr":
+        return "".join(text.text or "" for text in cell.iter(f"{XLSX_NS}t"))
+
+    value = cell.findtext(f"{XLSX_NS}v")
+
+    if value is None:
+        return ""
+    if cell_type == "s":
+        return shared_strings[int(value)]
+    if cell_type in ("str", "b", "e"):
+        return value
+
+    # Sonlar: STIR va telefon raqamlari Excelda ko'pincha son bo'lib saqlanadi (123456789.0, 1.2E+8)
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+
+    return str(int(number)) if number.is_integer() else value
+
+
+def iter_xlsx_rows(file):
+    """
+    Birinchi varaq qatorlarini o'qiydi. XML oqim bilan tahlil qilinadi, o'qilgan qatorlar xotiradan tozalanadi.
+    """
+    with zipfile.ZipFile(file) as archive:
+        shared_strings = read_shared_strings(archive)
+        sheets = sorted(name for name in archive.namelist() if re.fullmatch(r"xl/worksheets/sheet\d+\.xml", name))
+
+        if not sheets:
+            return
+
+        with archive.open("xl/worksheets/sheet1.xml" if "xl/worksheets/sheet1.xml" in sheets else sheets[0]) as sheet:
+            for event, element in iterparse(sheet):
+                if element.tag != f"{XLSX_NS}row":
+                    continue
+
+                row = []
+                for position, cell in enumerate(element.iter(f"{XLSX_NS}c")):
+                    # Bo'sh kataklar faylda bo'lmasligi mumkin
+                    index = column_index(cell.get("r")) if cell.get("r") else position
+                    row.extend([""] * (index - len(row)))
+                    row.append(cell_value(cell, shared_strings))
+
+                element.clear()
+                yield row
+
+
+IMPORT_FORMATS = {
+    "csv": iter_csv_rows,
+    "xlsx": iter_xlsx_rows,
+}
+
+
+def detect_format(file, name=""):
+    if name.lower().endswith(".xlsx"):
+        return "xlsx"
+    if name.lower().endswith(".csv"):
+        return "csv"
+
+    # XLSX - zip arxiv
+    position = file.tell()
+    signature = file.read(4)
+    file.seek(position)
+
+    return "xlsx" if signature == b"PK\x03\x04" else "csv"
+
+
+class LookupMap:
+    """
+    Bog'langan model yozuvlarini id yoki nomi (katta-kichik harfsiz) bo'yicha topish. Bir xil nomlilar noaniq hisoblanadi.
+    """
+
+    AMBIGUOUS = object()
+
+    def __init__(self, queryset):
+        self.by_id, self.by_name = {}, {}
+
+        for pk, name in queryset.values_list("id", "name"):
+            self.by_id[str(pk)] = pk
+            key = name.strip().casefold()
+            self.by_name[key] = self.AMBIGUOUS if key in self.by_name else pk
+
+    def resolve(self, value):
+        """
+        (id, xatolik matni) qaytaradi.
+        """
+        pk = self.by_id.get(value) if value.isdigit() else None
+        pk = pk if pk is not None else self.by_name.get(value.casefold())
+
+        if pk is self.AMBIGUOUS:
+            return None, f"'{value}' nomli bir nechta yozuv bor, id ko'rsating."
+        if pk is None:
+            return None, f"'{value}' topilmadi."
+        return pk, None
+
+
+class CompanyImporter:
+    """
+    Kompaniyalarni CSV/XLSX dan ommaviy yuklash. STIR bo'yicha mavjudlari yangilanadi, yangilari yaratiladi.
+
+    Fayl qatorma-qator o'qiladi, bo'lim va kompaniya turi oldindan yuklangan lug'atlardan topiladi. Har bir partiya
+    bitta tranzaksiyada `bulk_create(update_conflicts=True)` bilan yoziladi, so'ng qidiruv indeksi, statistika
+    hisoblagichlari va token keshi yangilanadi.
+    """
+
+    def __init__(self, batch_size=1000, max_errors=None):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.departments = LookupMap(Department.objects.all())
+        self.company_types = LookupMap(CompanyType.objects.all())
+        self.max_lengths = {field: Company._meta.get_field(field).max_length for field in ["name", "stir", "phone_number", "status", "region", "district"]}
+        self.seen_stirs = {}
+        self.line = 1
+        self.report = {"total": 0, "created": 0, "updated": 0, "error_count": 0, "file_error": False, "errors": []}
+
+    def run(self, rows):
+        """
+        Fayl o'qilmasa yuklash to'xtaydi, oldingi partiyalar saqlangan bo'ladi va hisobotda `file_error` True.
+        """
+        try:
+            self.import_rows(iter(rows))
+        except tuple(FILE_ERRORS) as error:
+            message = next(text for error_class, text in FILE_ERRORS.items() if isinstance(error, error_class))
+            self.add_file_error(self.line, {"file": [message]})
+
+        return self.report
+
+    def import_rows(self, rows):
+        header = next(rows, None)
+
+        if header is None:
+            self.add_file_error(1, {"file": ["Fayl bo'sh."]})
+            return
+
+        columns = [COLUMNS.get(title.strip().casefold()) for title in header]
+        missing = [field for field in REQUIRED_FIELDS if field not in columns]
+
+        if missing:
+            self.add_file_error(1, {field: ["Ustun topilmadi."] for field in missing})
+            return
+
+        numbered = self.number_rows(rows)
+
+        while batch := list(islice(numbered, self.batch_size)):
+            companies = []
+
+            for line, row in batch:
+                if not any(value.strip() for value in row):
+                    continue
+
+                self.report["total"] += 1
+                company = self.build_company(line, dict(zip(columns, row)))
+
+                if company is not None:
+                    companies.append(company)
+
+            if companies:
+                self.save_batch(companies)
+
+    def number_rows(self, rows):
+        for line, row in enumerate(rows, start=2):
+            # Fayl o'qilmasa hisobotda o'qish to'xtagan qator (CSV bloklab dekodlanadi, taxminiy)
+            self.line = line + 1
+            yield line, row
+
+    def build_company(self, line, values):
+        data, errors = {}, {}
+
+        for field in ["name", "stir", "phone_number", "status", "region", "district"]:
+            value = (values.get(field) or "").strip()
+
+            if not value and field in REQUIRED_FIELDS:
+                errors[field] = ["Majburiy maydon."]
+            elif len(value) > self.max_lengths[field]:
+                errors[field] = [f"{self.max_lengths[field]} belgidan oshmasligi kerak."]
+
+            data[field] = (value or None) if field == "phone_number" else value
+
+        for field, lookup in (("department", self.departments), ("company_type", self.company_types)):
+            value = (values.get(field) or "").strip()
+
+            if not value:
+                errors[field] = ["Majburiy maydon."]
+                continue
+
+            data[f"{field}_id"], error = lookup.resolve(value)
+            if error:
+                errors[field] = [error]
+
+        if data["stir"] and "stir" not in errors:
+            if data["stir"] in self.seen_stirs:
+                errors["stir"] = [f"STIR faylda takrorlangan ({self.seen_stirs[data['stir']]}-qator)."]
+            else:
+                self.seen_stirs[data["stir"]] = line
+
+        if errors:
+            self.add_error(line, errors)
+            return None
+
+        return Company(**data)
+
+    def add_file_error(self, line, errors):
+        self.report["file_error"] = True
+        self.add_error(line, errors)
+
+    def add_error(self, line, errors):
+        self.report["error_count"] += 1
+
+        if self.max_errors is None or len(self.report["errors"]) < self.max_errors:
+            self.report["errors"].append({"row": line, "errors": errors})
+
+    def save_batch(self, companies):
+        stirs = [company.stir for company in companies]
+
+        with transaction.atomic():
+            existing = {
+                stir: (pk, department_id, region)
+                for stir, pk, department_id, region in Company.objects.filter(stir__in=stirs).values_list("stir", "id", "department_id", "region")
+            }
+
+            Company.objects.bulk_create(companies, update_conflicts=True, unique_fields=["stir"], update_fields=UPDATE_FIELDS)
+
+            if any(company.pk is None for company in companies):
+                # Backend upsert da id qaytarmaydi
+                ids = dict(Company.objects.filter(stir__in=stirs).values_list("stir", "id"))
+                for company in companies:
+                    company.pk = ids[company.stir]
+
+            # bulk_create signallarni chaqirmaydi
+            changes = {}
+            for company in companies:
+                if company.stir in existing:
+                    pk, department_id, region = existing[company.stir]
+                    changes[company.pk] = {
+                        field: {"old": old, "new": new}
+                        for field, old, new in (("department", department_id, company.department_id), ("region", region, company.region))
+                        if old != new
+                    }
+
+            get_search_index(Company).update(companies)
+            companies_changed(changes)
+
+        # Token keshidagi kompaniya obyektlari eskirdi
+        company_token_cache.invalidate_companies([pk for pk, department_id, region in existing.values()])
+
+        self.report["updated"] += len(existing)
+        self.report["created"] += len(companies) - len(existing)
+
+
+def import_companies(file, name="", batch_size=1000, max_errors=None):
+    """
+    Fayldan kompaniyalarni yuklaydi va hisobot qaytaradi: {"total", "created", "updated", "error_count", "file_error", "errors"}.
+    """
+    rows = IMPORT_FORMATS[detect_format(file, name)](file)
+    return CompanyImporter(batch_size=batch_size, max_errors=max_errors).run(rows)
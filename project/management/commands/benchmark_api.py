@@ -0,0 +1,98 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from project.benchmarks import DEFAULT_VOLUMES, get_scenarios, measure, seed
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Alohida test bazasini (SQLite) berilgan hajmdagi ma'lumotlar bilan to'ldirib, asosiy API endpointlarining "
+        "kechikishi, o'tkazuvchanligi va SQL so'rovlar sonini o'lchaydi. Natija JSON ko'rinishida chiqadi."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--only", nargs="*", help="Faqat shu nomdagi endpointlar")
+        parser.add_argument("--output", help="Natijani JSON faylga yozish")
+        parser.add_argument("--compare", help="Oldingi natija (JSON) bilan solishtirish")
+
+    def handle(self, *args, **options):
+        volumes = {name: options[name] for name in DEFAULT_VOLUMES}
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+
+        try:
+            fixtures = seed(volumes, random_seed=options["seed"])
+            results = {}
+
+            for name, (call, before) in get_scenarios(fixtures, options["page_size"]).items():
+                if options["only"] and name not in options["only"]:
+                    continue
+
+                results[name] = measure(call, options["iterations"], before=before)
+                self.stderr.write(f"{name}: p50 {results[name]['p50_ms']} ms, {results[name]['queries']} queries")
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "revision": git_revision(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "volumes": volumes,
+                "iterations": options["iterations"],
+                "page_size": options["page_size"],
+                "seed": options["seed"],
+            },
+            "results": results,
+        }
+
+        output = json.dumps(report, indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                self.write_comparison(json.load(file), report)
+
+    def write_comparison(self, previous, current):
+        self.stderr.write(f"\n{previous['meta'].get('revision')} -> {current['meta'].get('revision')}")
+
+        for name, result in current["results"].items():
+            old = previous["results"].get(name)
+
+            if not old:
+                continue
+
+            change = (result["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0
+            self.stderr.write(
+                f"{name:28} p50 {old['p50_ms']:>9} -> {result['p50_ms']:>9} ms ({change:+.1f}%)"
+                f"   queries {old['queries']} -> {result['queries']}"
+            )
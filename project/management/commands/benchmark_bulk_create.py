@@ -0,0 +1,79 @@
+import io
+import json
+import tempfile
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from project.models import Company, CompanyType, Department, Employee
+
+
+class Rollback(Exception):
+    pass
+
+
+def make_image(name):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "white").save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class Command(BaseCommand):
+    help = "requests/bulk_create va bittalab POST /api/requests/ tezligini solishtiradi (ma'lumotlar saqlanmaydi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=50)
+        parser.add_argument("--images", type=int, default=2, help="Har bir so'rovdagi rasmlar soni")
+
+    def handle(self, *args, **options):
+        items, images = options["items"], options["images"]
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANTS={"ASYNC": False, "SIZES": []}):
+            try:
+                with transaction.atomic():
+                    results = self.run(items, images)
+                    raise Rollback
+            except Rollback:
+                pass
+
+        single, bulk = results["single"], results["bulk"]
+        self.stdout.write(json.dumps(results, indent=2))
+        self.stdout.write(f"bulk_create {single / bulk:.1f}x tezroq")
+
+    def run(self, items, images):
+        department = Department.objects.create(name="Benchmark", region="-", district="-")
+        company_type = CompanyType.objects.create(name="Benchmark")
+        company = Company.objects.create(department=department, company_type=company_type, name="Benchmark", stir="000000000", status="-", region="-", district="-")
+        employee = Employee.objects.create_user("+000000000000", "benchmark", department=department, is_staff=True)
+
+        client = APIClient()
+        client.force_authenticate(employee)
+        item = {"company": company.pk, "priority": 1, "description": "Benchmark", "lat": 41.3, "long": 69.2}
+
+        started = time.perf_counter()
+        for i in range(items):
+            data = {**item, "images": [make_image(f"{i}-{j}.jpg") for j in range(images)]}
+            assert client.post("/api/requests/", data, format="multipart").status_code == 201
+        single = time.perf_counter() - started
+
+        data = {"items": json.dumps([item] * items)}
+        for i in range(items):
+            data[f"images[{i}]"] = [make_image(f"{i}-{j}.jpg") for j in range(images)]
+
+        started = time.perf_counter()
+        assert client.post("/api/requests/bulk_create/", data, format="multipart").status_code == 201
+        bulk = time.perf_counter() - started
+
+        return {
+            "items": items,
+            "images_per_item": images,
+            "single": round(single, 4),
+            "bulk": round(bulk, 4),
+            "single_items_per_second": round(items / single, 1),
+            "bulk_items_per_second": round(items / bulk, 1),
+        }
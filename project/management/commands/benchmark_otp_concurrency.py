@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from project.messaging import LocalTransport, dispatcher
+from project.models import OTP, Company, CompanyType, Department
+from project.profiling import percentile
+
+
+class SlowTransport(LocalTransport):
+    """
+    Telegram API kechikishini taqlid qiladi.
+    """
+
+    latency = 0.2
+
+    def send(self, message):
+        time.sleep(self.latency)
+        super().send(message)
+
+    async def asend(self, message):
+        await asyncio.sleep(self.latency)
+        super().send(message)
+
+
+def summarize(durations, total):
+    milliseconds = [duration * 1000 for duration in durations]
+
+    return {
+        "flows": len(durations),
+        "seconds": round(total, 3),
+        "flows_per_second": round(len(durations) / total, 1),
+        "p50_ms": round(percentile(milliseconds, 0.5), 2),
+        "p99_ms": round(percentile(milliseconds, 0.99), 2),
+    }
+
+
+def client_ip(company):
+    return f"10.{company.pk // 65536 % 256}.{company.pk // 256 % 256}.{company.pk % 256}"
+
+
+class Command(BaseCommand):
+    help = "send_otp + verify_otp oqimini WSGI (sinxron viewlar, threadlar) va ASGI (async viewlar, bitta event loop) da solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flows", type=int, default=200, help="OTP oqimlari soni")
+        parser.add_argument("--concurrency", type=int, default=100, help="Bir vaqtdagi mijozlar soni (ASGI)")
+        parser.add_argument("--threads", type=int, default=8, help="WSGI worker threadlar soni")
+        parser.add_argument("--latency", type=float, default=200, help="Telegram API kechikishi (ms)")
+
+    def handle(self, *args, **options):
+        SlowTransport.latency = options["latency"] / 1000
+        flows = options["flows"]
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Threadlar bir bazani ko'rishi uchun test bazasi faylda; parallel yozuvchilar bir-birini kutadi
+            settings_dict = connections["default"].settings_dict
+            settings_dict["TEST"]["NAME"] = os.path.join(directory, "benchmark.sqlite3")
+            settings_dict["OPTIONS"].update(timeout=30, transaction_mode="IMMEDIATE")
+
+            setup_test_environment()
+            runner = DiscoverRunner(verbosity=0, interactive=False)
+            old_config = runner.setup_databases()
+            transport, workers = dispatcher.transport, dispatcher.workers
+            dispatcher.transport, dispatcher.workers = SlowTransport(), 0
+
+            try:
+                companies = self.seed(flows)
+                report = {
+                    "latency_ms": options["latency"],
+                    "wsgi": self.run_wsgi(companies, options["threads"]),
+                    "asgi": self.run_asgi(companies, options["concurrency"]),
+                }
+            finally:
+                dispatcher.transport, dispatcher.workers = transport, workers
+                runner.teardown_databases(old_config)
+                teardown_test_environment()
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, count):
+        department = Department.objects.create(name="Benchmark", region="-", district="-")
+        company_type = CompanyType.objects.create(name="Benchmark")
+
+        return Company.objects.bulk_create(
+            [
+                Company(department=department, company_type=company_type, name=f"Benchmark {i}", stir=f"{500000000 + i}", phone_number=f"+99893{i:07d}", status="-", region="-", district="-")
+                for i in range(count)
+            ]
+        )
+
+    def run_wsgi(self, companies, threads):
+        def flow(company):
+            # Har bir oqim alohida mijoz, IP cheklovi ishga tushmasligi uchun
+            client = Client(REMOTE_ADDR=client_ip(company))
+            started = time.perf_counter()
+
+            assert client.post("/api/company-auth/send_otp/", {"stir": company.stir}).status_code == 200
+            code = OTP.objects.get(company=company).code
+            assert client.post("/api/company-auth/verify_otp/", {"phone_number": company.phone_number, "otp": code}).status_code == 200
+
+            connections.close_all()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            durations = list(executor.map(flow, companies))
+        total = time.perf_counter() - started
+
+        # Navbatdagi xabarlarni yuborish vaqti alohida (workerlar so'rovdan tashqarida bajaradi)
+        result = summarize(durations, total)
+        result["delivered"] = dispatcher.drain()
+        return result
+
+    def run_asgi(self, companies, concurrency):
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def flow(company):
+                async with semaphore:
+                    client = AsyncClient(client=(client_ip(company), 0))
+                    started = time.perf_counter()
+
+                    response = await client.post("/api/company-auth/send_otp/", {"stir": company.stir}, content_type="application/json")
+                    assert response.status_code == 200, response.content
+                    code = (await OTP.objects.aget(company=company)).code
+                    response = await client.post("/api/company-auth/verify_otp/", {"phone_number": company.phone_number, "otp": code}, content_type="application/json")
+                    assert response.status_code == 200, response.content
+
+                    return time.perf_counter() - started
+
+            random.shuffle(companies)
+            started = time.perf_counter()
+            durations = await asyncio.gather(*(flow(company) for company in companies))
+            total = time.perf_counter() - started
+
+            # Fonda yuborilayotgan xabarlar tugashini kutish
+            while len(SlowTransport.outbox) < 2 * len(companies):
+                await asyncio.sleep(0.01)
+
+            return summarize(durations, total)
+
+        with override_settings(ROOT_URLCONF="config.asgi_urls"):
+            return asyncio.run(main())
@@ -0,0 +1,108 @@
+import gzip
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from project.benchmarks import DEFAULT_VOLUMES, measure, percentile, seed
+from project.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = (
+        "/api/requests/ sahifalarini turli rendererlar (json, orjson, msgpack) bilan seriyalash vaqti va "
+        "gzip/brotli bilan siqilgan hajmini o'lchaydi. Natija JSON ko'rinishida chiqadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--page-sizes", nargs="*", type=int, default=[20, 100, 500])
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def get_renderers(self):
+        renderers = {"json": JSONRenderer()}
+
+        if orjson is not None:
+            renderers["orjson"] = ORJSONRenderer()
+        if msgpack is not None:
+            renderers["msgpack"] = MessagePackRenderer()
+
+        return renderers
+
+    def time_render(self, renderer, data, iterations):
+        durations = []
+
+        for _ in range(iterations):
+            started = time.perf_counter()
+            content = renderer.render(data, renderer.media_type, {})
+            durations.append((time.perf_counter() - started) * 1000)
+
+        return content, {"p50_ms": round(percentile(durations, 0.5), 3), "p90_ms": round(percentile(durations, 0.9), 3)}
+
+    def get_sizes(self, content):
+        sizes = {"raw": len(content), "gzip": len(gzip.compress(content, compresslevel=6))}
+
+        if brotli is not None:
+            sizes["br"] = len(brotli.compress(content, quality=5))
+
+        return sizes
+
+    def handle(self, *args, **options):
+        volumes = {**DEFAULT_VOLUMES, "requests": options["requests"]}
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+
+        try:
+            fixtures = seed(volumes, random_seed=options["seed"])
+            staff = APIClient()
+            staff.force_authenticate(fixtures["staff"])
+
+            results = {}
+
+            for page_size in options["page_sizes"]:
+                url = f"/api/requests/?page_size={page_size}"
+                data = staff.get(url).data
+                page = results[f"page-{page_size}"] = {}
+
+                for name, renderer in self.get_renderers().items():
+                    content, timings = self.time_render(renderer, data, options["iterations"])
+                    page[name] = {**timings, "bytes": self.get_sizes(content)}
+
+                # To'liq so'rov: view + renderer + siqish middleware
+                for name, headers in {
+                    "http-json-gzip": {"HTTP_ACCEPT": "application/json", "HTTP_ACCEPT_ENCODING": "gzip"},
+                    "http-json-br": {"HTTP_ACCEPT": "application/json", "HTTP_ACCEPT_ENCODING": "br, gzip"},
+                    "http-msgpack-br": {"HTTP_ACCEPT": "application/msgpack", "HTTP_ACCEPT_ENCODING": "br, gzip"},
+                }.items():
+                    if "msgpack" in name and msgpack is None:
+                        continue
+
+                    result = measure(lambda: staff.get(url, **headers), options["iterations"])
+                    page[name] = {key: result[key] for key in ("p50_ms", "p90_ms", "response_bytes")}
+
+                self.stderr.write(
+                    f"page_size={page_size}: "
+                    + ", ".join(f"{name} {item['p50_ms']} ms" for name, item in page.items())
+                )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        report = {
+            "meta": {"volumes": volumes, "iterations": options["iterations"], "brotli": brotli is not None},
+            "results": results,
+        }
+
+        self.stdout.write(json.dumps(report, indent=2))
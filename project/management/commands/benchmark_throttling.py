@@ -0,0 +1,64 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from project.profiling import percentile
+from project.throttling import OTPRateLimiter, get_idents
+
+
+class Command(BaseCommand):
+    help = (
+        "send_otp / verify_otp cheklovlarining bitta so'rovga qo'shadigan vaqtini o'lchaydi: jarayon ichidagi "
+        "hisoblagichlar va Django cache tier bilan. Natija JSON ko'rinishida chiqadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100_000)
+        parser.add_argument("--clients", type=int, default=10_000, help="Turli IP / STIR / telefon raqamlari soni")
+        parser.add_argument("--backend", help="Cache tier uchun CACHES alias (berilmasa vaqtinchalik locmem)")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        factory = RequestFactory()
+
+        requests = []
+        for _ in range(options["requests"]):
+            client = rng.randrange(options["clients"])
+            action = rng.choice(["send_otp", "verify_otp"])
+            data = {"stir": f"{300000000 + client}"} if action == "send_otp" else {"phone_number": f"+99890{client:07d}", "otp": 123456}
+            requests.append((action, factory.post(f"/api/company-auth/{action}/", REMOTE_ADDR=f"10.0.{client // 256 % 256}.{client % 256}"), data))
+
+        report = {"requests": options["requests"], "clients": options["clients"], "results": {}}
+
+        # locmem ning standart MAX_ENTRIES (300) hisoblagichlarni o'chirib yuboradi
+        benchmark_cache = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "OPTIONS": {"MAX_ENTRIES": 10 * options["requests"]}}
+
+        with override_settings(CACHES={**settings.CACHES, "throttle-benchmark": benchmark_cache}):
+            for name, backend in {"local": None, "cache": options["backend"] or "throttle-benchmark"}.items():
+                report["results"][name] = self.run(requests, backend)
+                self.stderr.write(f"{name}: p50 {report['results'][name]['p50_us']} us, p99 {report['results'][name]['p99_us']} us")
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, requests, backend):
+        throttle = settings.OTP_THROTTLE
+        limiter = OTPRateLimiter(throttle["RATES"], throttle["MAX_ATTEMPTS"], throttle["LOCKOUT"], throttle["MAX_SIZE"], backend=backend)
+        durations, throttled = [], 0
+
+        for action, request, data in requests:
+            started = time.perf_counter()
+            throttled += limiter.check(action, get_idents(request, data)) is not None
+            durations.append((time.perf_counter() - started) * 1000)
+
+        return {
+            "mean_us": round(sum(durations) / len(durations) * 1000, 2),
+            "p50_us": round(percentile(durations, 0.5) * 1000, 2),
+            "p99_us": round(percentile(durations, 0.99) * 1000, 2),
+            "throttled": throttled,
+            "under_1ms": percentile(durations, 0.99) < 1,
+        }
@@ -0,0 +1,67 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from project.models import OTP, Company, Request
+from project.routers import router
+
+FULL_SCAN = re.compile(r"\bSCAN (\w+)$")
+
+
+def get_query_checks():
+    """
+    Viewsetlar va autentifikatsiya oqimidagi filtrlangan so'rovlar ro'yxati: (nomi, queryset).
+    """
+    checks = []
+
+    for prefix, viewset, basename in router.registry:
+        if viewset.queryset is None:
+            continue
+
+        for field in getattr(viewset, "filterset_fields", None) or []:
+            checks.append((f"{prefix}?{field}=", viewset.queryset.filter(**{field: 1})))
+
+    checks += [
+        ("company-auth/send_otp", Company.objects.filter(stir="1")),
+        ("company-auth/verify_otp", Company.objects.filter(phone_number="1")),
+        ("company-auth/verify_otp", OTP.objects.active().filter(company_id=1, code="1")),
+        ("purge_expired_otps", OTP.objects.expired()),
+        ("company-auth/requests", Request.objects.for_serialization(company=False).filter(company_id=1).order_by("id")),
+        ("requests?status=", Request.objects.filter(status="pending")),
+        ("requests?priority=", Request.objects.filter(priority=1)),
+        ("requests?performer=&status=", Request.objects.filter(performer_id=1, status="pending")),
+        ("requests/nearby", Request.objects.within_box(41.3, 69.2, 5000)),
+    ]
+
+    return checks
+
+
+def find_full_scans(plan):
+    return [match.group(1) for line in plan.splitlines() if (match := FULL_SCAN.search(line.strip()))]
+
+
+class Command(BaseCommand):
+    help = "Asosiy so'rovlar uchun EXPLAIN QUERY PLAN ni chiqaradi va indekssiz to'liq skanlarni aniqlaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strict", action="store_true", help="To'liq skan topilsa xatolik bilan tugatish")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Faqat SQLite uchun EXPLAIN QUERY PLAN tahlili qo'llab-quvvatlanadi")
+
+        failures = []
+
+        for label, queryset in get_query_checks():
+            plan = queryset.explain()
+            scans = find_full_scans(plan)
+
+            self.stdout.write(self.style.ERROR(f"FULL SCAN {label}") if scans else self.style.SUCCESS(f"OK {label}"))
+            self.stdout.write(f"  {plan}".replace("\n", "\n  "))
+
+            if scans:
+                failures.append(f"{label}: {', '.join(scans)}")
+
+        if failures and options["strict"]:
+            raise CommandError("Indekssiz so'rovlar topildi:\n" + "\n".join(failures))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from project.images import generate_variants, needs_variants
+from project.models import Employee, News, RequestImage
+
+
+class Command(BaseCommand):
+    help = "Mavjud rasmlar uchun kichraytirilgan nusxalarni yaratadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Nusxalari bor rasmlarni ham qayta yaratish")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model in (RequestImage, Employee, News):
+            processed = 0
+            queryset = model.objects.only("id", "image", "image_variants").order_by("id")
+
+            for instance in queryset.iterator(chunk_size=options["chunk_size"]):
+                if options["force"] or needs_variants(instance):
+                    generate_variants(instance)
+                    processed += 1
+
+            self.stdout.write(f"{model.__name__}: {processed} ta rasm qayta ishlandi")
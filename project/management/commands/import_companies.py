@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.imports import import_companies
+
+
+class Command(BaseCommand):
+    help = "Kompaniyalarni CSV/XLSX fayldan yuklaydi (STIR bo'yicha mavjudlari yangilanadi) va hisobotni JSON ko'rinishida chiqaradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV yoki XLSX fayl")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Bitta tranzaksiyadagi qatorlar soni")
+        parser.add_argument("--max-errors", type=int, help="Hisobotdagi xatoliklar soni chegarasi")
+
+    def handle(self, *args, **options):
+        try:
+            file = open(options["path"], "rb")
+        except OSError as error:
+            raise CommandError(error)
+
+        with file:
+            report = import_companies(file, name=options["path"], batch_size=options["batch_size"], max_errors=options["max_errors"])
+
+        for error in report["errors"]:
+            self.stderr.write(f"{error['row']}-qator: {json.dumps(error['errors'], ensure_ascii=False)}")
+
+        self.stdout.write(json.dumps({key: value for key, value in report.items() if key != "errors"}, indent=2))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.models import OTP
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan OTP kodlarini partiyalab o'chiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Bitta DELETE dagi qatorlar soni")
+        parser.add_argument("--once", action="store_true", help="Bir marta tozalab chiqish")
+        parser.add_argument("--interval", type=float, default=300, help="Tozalash oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = OTP.objects.purge_expired(batch_size=options["batch_size"])
+            self.stdout.write(f"{deleted} ta eskirgan OTP o'chirildi")
+
+            if options["once"]:
+                break
+
+            time.sleep(options["interval"])
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from project.stats import compute_counters, find_mismatches, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "So'rovlar statistikasi hisoblagichlarini noldan qayta hisoblaydi yoki (--verify) saqlanganlari bilan solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="Faqat tekshirish, farq bo'lsa xatolik bilan tugaydi")
+
+    def handle(self, *args, **options):
+        if not options["verify"]:
+            counters = rebuild_counters()
+            self.stdout.write(f"{len(counters)} ta hisoblagich qayta hisoblandi")
+            return
+
+        expected = compute_counters()
+        mismatches = find_mismatches(expected)
+
+        for (dimension, key, status), (stored, actual) in sorted(mismatches.items()):
+            self.stdout.write(f"{dimension}={key or '-'} [{status}]: saqlangan {stored}, haqiqiy {actual}")
+
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} ta hisoblagich mos emas, `rebuild_request_stats` ni ishga tushiring")
+
+        self.stdout.write(f"{len(expected)} ta hisoblagich to'g'ri")
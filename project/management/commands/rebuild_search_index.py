@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from project.search import SEARCH_INDEXES
+
+
+class Command(BaseCommand):
+    help = "To'liq matnli qidiruv indekslarini jadvallardan qayta quradi"
+
+    def handle(self, *args, **options):
+        for model, index in SEARCH_INDEXES.items():
+            if not index.is_available():
+                self.stdout.write(f"{model.__name__}: FTS5 mavjud emas, oddiy qidiruv ishlatiladi")
+                continue
+
+            self.stdout.write(f"{model.__name__}: {index.rebuild()} ta yozuv indekslandi")
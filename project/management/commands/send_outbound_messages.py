@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.messaging import dispatcher
+
+
+class Command(BaseCommand):
+    help = "Navbatdagi xabarlarni (OTP va boshqalar) yuboradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Navbatni bir marta bo'shatib chiqish")
+        parser.add_argument("--interval", type=float, default=2, help="Navbatni tekshirish oralig'i (soniya)")
+
+    def handle(self, *args, **options):
+        while True:
+            sent = dispatcher.drain()
+
+            if sent:
+                self.stdout.write(f"{sent} ta xabar yuborildi")
+
+            if options["once"]:
+                break
+
+            time.sleep(options["interval"])
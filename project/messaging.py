@@ -0,0 +1,312 @@
+import logging
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+from .models import OutboundMessage
+from .utils import TelegramError, get_async_bot_client, get_bot_client
+
+logger = logging.getLogger(__name__)
+
+
+class TransportError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BaseTransport(ABC):
+    @abstractmethod
+    def send(self, message: OutboundMessage):
+        pass
+
+    def capacity(self, chat_id, seconds):
+        """
+        `seconds` ichida shu chatga yuborish mumkin bo'lgan xabarlar soni (None - cheklanmagan).
+        """
+        return None
+
+    async def asend(self, message: OutboundMessage):
+        await sync_to_async(self.send, thread_sensitive=False)(message)
+
+    def send_batch(self, messages):
+        """
+        Har bir xabar uchun None (muvaffaqiyatli) yoki xatolik obyektini qaytaradi.
+        """
+        results = []
+
+        for message in messages:
+            try:
+                self.send(message)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+
+        return results
+
+
+class TelegramTransport(BaseTransport):
+    """
+    Umumiy Telegram mijozi orqali yuborish (keep-alive sessiya, rate limit).
+    """
+
+    def __init__(self):
+        self.client = get_bot_client()
+
+    def payload(self, message):
+        return {"chat_id": message.chat_id, "text": message.text, "thread_id": message.thread_id, "parse_mode": message.parse_mode}
+
+    def capacity(self, chat_id, seconds):
+        return self.client.rate_limiter.capacity(chat_id, seconds)
+
+    def send(self, message):
+        try:
+            self.client.send_message(**self.payload(message))
+        except TelegramError as e:
+            raise TransportError(str(e), retry_after=e.retry_after) from e
+
+    async def asend(self, message):
+        try:
+            await get_async_bot_client().send_message(**self.payload(message))
+        except TelegramError as e:
+            raise TransportError(str(e), retry_after=e.retry_after) from e
+
+    def send_batch(self, messages):
+        results = self.client.send_batch([self.payload(message) for message in messages])
+
+        return [TransportError(str(result), retry_after=result.retry_after) if isinstance(result, TelegramError) else None for result in results]
+
+
+class LocalTransport(BaseTransport):
+    """
+    Xabarlarni xotirada saqlaydi. Testlar va lokal ishlab chiqish uchun.
+    """
+
+    outbox = []
+
+    def send(self, message):
+        self.outbox.append({"chat_id": message.chat_id, "thread_id": message.thread_id, "text": message.text})
+
+
+class Dispatcher:
+    """
+    Navbatdagi xabarlarni worker threadlar orqali yuboradi.
+
+    Xabarlar `claim` orqali band qilinadi, shuning uchun bir nechta worker (yoki jarayon) bitta xabarni ikki marta yubormaydi.
+    Har bir chatdan rate limit bo'yicha band qilish muddatining yarmida yuborib bo'linadigan xabarlargina olinadi,
+    aks holda xabar kutib turganda muddat tugab, boshqa worker uni qayta yuborishi mumkin.
+    Muvaffaqiyatsiz yuborishlar eksponensial kechikish bilan qayta uriniladi.
+    """
+
+    def __init__(self, transport=None, workers=2, batch_size=20, max_attempts=5, backoff=2, lock_timeout=60, poll_interval=5):
+        self.transport = transport
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self._in_flight = Counter()
+
+    def get_transport(self):
+        if self.transport is None:
+            self.transport = import_string(settings.OUTBOUND_MESSAGES["TRANSPORT"])()
+        return self.transport
+
+    def enqueue(self, chat_id, text, thread_id=None, parse_mode="HTML"):
+        message = OutboundMessage.objects.create(chat_id=chat_id, text=text, thread_id=thread_id, parse_mode=parse_mode)
+        transaction.on_commit(self.wake)
+        return message
+
+    def wake(self):
+        if self.workers:
+            self.start()
+            self._wakeup.set()
+
+    def start(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"outbound-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+        for thread in self._threads:
+            thread.join()
+
+        self._threads = []
+        self._stop.clear()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Outbound message worker failed")
+            finally:
+                close_old_connections()
+
+    def drain(self):
+        """
+        Navbat bo'shaguncha xabarlarni yuboradi. Yuborilgan xabarlar sonini qaytaradi.
+        """
+        sent = 0
+
+        while not self._stop.is_set():
+            batch = self.claim()
+
+            if not batch:
+                break
+
+            try:
+                for message, error in zip(batch, self.get_transport().send_batch(batch)):
+                    sent += self.record(message, error)
+            finally:
+                self.release(batch)
+
+        return sent
+
+    def claim(self):
+        current = now()
+        claim = uuid.uuid4().hex
+
+        ready = Q(status=OutboundMessage.PENDING, next_attempt_at__lte=current) | Q(
+            status=OutboundMessage.SENDING, locked_at__lt=current - timedelta(seconds=self.lock_timeout)
+        )
+
+        # Boshqa threadlar band qilgan, lekin hali rate limiter dan o'tmagan xabarlar ham hisobga olinadi
+        with self._claim_lock:
+            candidates = OutboundMessage.objects.filter(ready).order_by("next_attempt_at").values_list("id", "chat_id")[: self.batch_size]
+            ids = self.within_capacity(candidates)
+
+            if not ids:
+                return []
+
+            OutboundMessage.objects.filter(ready, pk__in=ids).update(status=OutboundMessage.SENDING, claim=claim, locked_at=current)
+            batch = list(OutboundMessage.objects.filter(claim=claim, status=OutboundMessage.SENDING).order_by("id"))
+            self._in_flight.update(message.chat_id for message in batch)
+
+        return batch
+
+    def release(self, batch):
+        with self._claim_lock:
+            self._in_flight.subtract(message.chat_id for message in batch)
+            self._in_flight = +self._in_flight
+
+    def within_capacity(self, candidates):
+        """
+        Nomzodlardan band qilish muddatining yarmida yuborib bo'linadiganlari.
+        """
+        transport = self.get_transport()
+        budgets, ids = {}, []
+
+        for pk, chat_id in candidates:
+            if chat_id not in budgets:
+                capacity = transport.capacity(chat_id, self.lock_timeout / 2)
+                budgets[chat_id] = None if capacity is None else capacity - self._in_flight[chat_id]
+
+            if budgets[chat_id] is None or budgets[chat_id] > 0:
+                ids.append(pk)
+                budgets[chat_id] = None if budgets[chat_id] is None else budgets[chat_id] - 1
+
+        return ids
+
+    async def adeliver(self, message):
+        """
+        Xabarni joriy event loopda darhol yuborishga urinadi (ASGI viewlar uchun).
+
+        Rate limit bo'yicha kutish kerak bo'lsa, xabar band qilinmasa yoki yuborishda xatolik bo'lsa, u navbatda qoladi
+        va workerlar yuboradi.
+        """
+        if not self.reserve(message.chat_id):
+            return False
+
+        try:
+            claimed = await OutboundMessage.objects.filter(pk=message.pk, status=OutboundMessage.PENDING).aupdate(
+                status=OutboundMessage.SENDING, claim=uuid.uuid4().hex, locked_at=now()
+            )
+
+            if not claimed:
+                return False
+
+            try:
+                await self.get_transport().asend(message)
+                error = None
+            except Exception as e:
+                error = e
+
+            return bool(await sync_to_async(self.record)(message, error))
+        finally:
+            self.release([message])
+
+    def reserve(self, chat_id):
+        """
+        Chatga band qilish muddatining yarmida yuborish mumkin bo'lsa uni band qilingan xabarlarga qo'shadi.
+        """
+        with self._claim_lock:
+            capacity = self.get_transport().capacity(chat_id, self.lock_timeout / 2)
+
+            if capacity is not None and capacity - self._in_flight[chat_id] < 1:
+                return False
+
+            self._in_flight[chat_id] += 1
+            return True
+
+    def record(self, message, error):
+        message.attempts += 1
+
+        if error is not None:
+            message.last_error = str(error)
+
+            if message.attempts >= self.max_attempts:
+                message.status = OutboundMessage.FAILED
+                logger.error("Outbound message %s failed after %s attempts: %s", message.pk, message.attempts, error)
+            else:
+                delay = getattr(error, "retry_after", None) or self.backoff**message.attempts
+                message.status = OutboundMessage.PENDING
+                message.next_attempt_at = now() + timedelta(seconds=delay)
+
+            message.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+            return 0
+
+        message.status = OutboundMessage.SENT
+        message.sent_at = now()
+        message.save(update_fields=["attempts", "status", "sent_at"])
+        return 1
+
+
+def _build_dispatcher():
+    options = settings.OUTBOUND_MESSAGES
+
+    return Dispatcher(
+        workers=options.get("WORKERS", 2),
+        batch_size=options.get("BATCH_SIZE", 20),
+        max_attempts=options.get("MAX_ATTEMPTS", 5),
+        backoff=options.get("BACKOFF", 2),
+    )
+
+
+dispatcher = _build_dispatcher()
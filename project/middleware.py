@@ -1,20 +1,213 @@
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .caches import company_token_cache
+from .db import end_request, get_pin_key, replica_configured, start_request
+from .profiling import QueryCollector, view_stats
+
+logger = logging.getLogger("project.profiling")
 
-from .models import Company, CompanyToken
+
+def is_jwt(token_key):
+    return token_key.count(".") == 2
 
 
 class CompanyMiddleware(MiddlewareMixin):
     def process_request(self, request):
         token = request.META.get("HTTP_AUTHORIZATION")
+        request.company = None
 
         if token:
-            try:
-                token_key = token.split()[1]
-                token_obj = CompanyToken.objects.get(key=token_key)
-                company = Company.objects.get(pk=token_obj.company_id)
-
-                request.company = company
-            except (CompanyToken.DoesNotExist, Company.DoesNotExist, IndexError):
-                request.company = None
-        else:
-            request.company = None
+            parts = token.split()
+
+            if len(parts) < 2:
+                return
+
+            # Xodimlarning JWT tokenlari kompaniya kaliti bo'la olmaydi
+            if parts[0].lower() == "bearer" and is_jwt(parts[1]):
+                return
+
+            request.company = company_token_cache.get_company(parts[1])
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """
+    Yozgan mijozning keyingi o'qishlarini `DATABASE_REPLICA["PIN_SECONDS"]` davomida asosiy bazaga bog'laydi.
+
+    Replika asosiy bazadan ortda qolishi mumkin: mijoz o'zi yaratgan so'rovni ro'yxatda ko'rmay qolmasligi uchun.
+    Yozuvchi so'rovlar (POST, PUT, ...) to'liq asosiy bazada ishlaydi.
+    """
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        options = settings.DATABASE_REPLICA
+        request.db_pin_key = get_pin_key(request)
+
+        pinned = request.method not in ("GET", "HEAD", "OPTIONS") or caches[options["CACHE"]].get(request.db_pin_key) is not None
+        request.db_state = start_request(pinned)
+
+    def process_response(self, request, response):
+        state = getattr(request, "db_state", None)
+
+        if state is None:
+            return response
+
+        if state.written:
+            options = settings.DATABASE_REPLICA
+            caches[options["CACHE"]].set(request.db_pin_key, True, timeout=options["PIN_SECONDS"])
+
+        end_request()
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Har bir so'rov uchun umumiy vaqt, SQL so'rovlar soni va vaqtini o'lchaydi.
+
+    Natijalar `Server-Timing` sarlavhasida qaytariladi va view bo'yicha yig'iladi (`/api/profiling/stats/`).
+    Sekin so'rovlar eng ko'p takrorlangan SQL lar bilan birga logga yoziladi.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING["ENABLED"]:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.slow_request_ms = settings.PROFILING.get("SLOW_REQUEST_MS", 500)
+        self.top_statements = settings.PROFILING.get("TOP_STATEMENTS", 5)
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        key = match.view_name if match else "unresolved"
+
+        view_stats.record(key, duration, collector.count, collector.duration)
+
+        response["Server-Timing"] = (
+            f"total;dur={duration * 1000:.2f}, "
+            f'db;dur={collector.duration * 1000:.2f};desc="{collector.count} queries"'
+        )
+
+        if duration * 1000 >= self.slow_request_ms:
+            repeated = "\n".join(f"  {count}x {sql}" for sql, count in collector.repeated(self.top_statements))
+            logger.warning(
+                "Slow request %s %s (%s): %.1f ms, %s queries, %.1f ms SQL%s",
+                request.method,
+                request.path,
+                key,
+                duration * 1000,
+                collector.count,
+                collector.duration * 1000,
+                f"\nRepeated queries:\n{repeated}" if repeated else "",
+            )
+
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    `COMPRESSION["MIN_SIZE"]` baytdan katta javoblarni brotli (o'rnatilgan bo'lsa) yoki gzip bilan siqadi.
+
+    Kichik javoblar siqilmaydi - ularda CPU sarfi tejalgan baytlardan qimmat. Streaming javoblar (eksport, SSE) o'zgarmaydi.
+    HTML (browsable API, CSRF tokeni bor) faqat tasodifiy qo'shimcha baytli gzip bilan siqiladi (BREACH).
+    """
+
+    accepts_br = re.compile(r"\bbr\b")
+    accepts_gzip = re.compile(r"\bgzip\b")
+    # Maxfiy tokenlar bo'lishi mumkin bo'lgan turlar, brotli da tasodifiy to'ldirish yo'q
+    padded_content_types = {"text/html"}
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        options = settings.COMPRESSION
+
+        self.min_size = options.get("MIN_SIZE", 1024)
+        self.content_types = set(options.get("CONTENT_TYPES", ()))
+        self.brotli_quality = options.get("BROTLI_QUALITY", 5)
+
+    def get_encoding(self, request, content_type=None):
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+        if brotli is not None and content_type not in self.padded_content_types and self.accepts_br.search(accept_encoding):
+            return "br"
+        if self.accepts_gzip.search(accept_encoding):
+            return "gzip"
+        return None
+
+    def compress(self, content, encoding):
+        if encoding == "br":
+            return brotli.compress(content, quality=self.brotli_quality)
+
+        # Tasodifiy qo'shimcha baytlar BREACH hujumini qiyinlashtiradi (django GZipMiddleware kabi)
+        return compress_string(content, max_random_bytes=100)
+
+    def weaken_etag(self, response):
+        # Siqilgan javob bayt-bayt bir xil emas, shuning uchun ETag kuchsiz bo'ladi
+        if etag := response.get("ETag"):
+            response["ETag"] = re.sub(r'^"', 'W/"', etag)
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+
+        if response.status_code == 304:
+            # 304 dagi ETag shu so'rovga 200 javobdagi bilan bir xil bo'lishi kerak
+            if self.get_encoding(request) is not None:
+                self.weaken_etag(response)
+            return response
+
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+
+        if not 200 <= response.status_code < 300 or content_type not in self.content_types:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = self.get_encoding(request, content_type)
+        if encoding is None:
+            return response
+
+        # Siqilmagan kichik javoblarda ham, ETag javob hajmiga bog'liq bo'lmasligi uchun
+        self.weaken_etag(response)
+
+        if len(response.content) < self.min_size:
+            return response
+
+        compressed = self.compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+
+        return response
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.5 on 2026-10-18 00:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0020_company_company_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=64)),
+                ('thread_id', models.IntegerField(blank=True, null=True)),
+                ('text', models.TextField()),
+                ('parse_mode', models.CharField(default='HTML', max_length=16)),
+                ('status', models.CharField(choices=[('pending', 'PENDING'), ('sending', 'SENDING'), ('sent', 'SENT'), ('failed', 'FAILED')], default='pending', max_length=16)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('claim', models.CharField(blank=True, default='', max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='project_out_status_c4a7f9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0021_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='phone_number',
+            field=models.CharField(blank=True, db_index=True, default=None, max_length=13, null=True),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='stir',
+            field=models.CharField(db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='priority',
+            field=models.IntegerField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='status',
+            field=models.CharField(choices=[('pending', 'PENDING'), ('accepted', 'ACCEPTED'), ('rejected', 'REJECTED'), ('on_going', 'ON_GOING')], db_index=True, default='pending', max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['company', 'code'], name='otp_company_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['company', 'status'], name='request_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['performer', 'status'], name='request_performer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['uploader', 'status'], name='request_uploader_status_idx'),
+        ),
+    ]
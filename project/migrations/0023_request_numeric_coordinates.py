@@ -0,0 +1,113 @@
+import django.core.validators
+from django.db import migrations, models
+
+from project.geo import encode_geohash
+
+
+def parse_coordinate(value, limit):
+    try:
+        number = float(str(value).strip().replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+    return number if -limit <= number <= limit else None
+
+
+def coordinates_to_numbers(apps, schema_editor):
+    Request = apps.get_model("project", "Request")
+    batch = []
+
+    for request in Request.objects.only("id", "lat", "long").iterator(chunk_size=2000):
+        request.lat_value = parse_coordinate(request.lat, 90)
+        request.long_value = parse_coordinate(request.long, 180)
+
+        if request.lat_value is not None and request.long_value is not None:
+            request.geohash = encode_geohash(request.lat_value, request.long_value)
+
+        batch.append(request)
+
+        if len(batch) >= 2000:
+            Request.objects.bulk_update(batch, ["lat_value", "long_value", "geohash"])
+            batch = []
+
+    Request.objects.bulk_update(batch, ["lat_value", "long_value", "geohash"])
+
+
+def coordinates_to_strings(apps, schema_editor):
+    Request = apps.get_model("project", "Request")
+    batch = []
+
+    for request in Request.objects.only("id", "lat_value", "long_value").iterator(chunk_size=2000):
+        request.lat = "" if request.lat_value is None else str(request.lat_value)
+        request.long = "" if request.long_value is None else str(request.long_value)
+        batch.append(request)
+
+        if len(batch) >= 2000:
+            Request.objects.bulk_update(batch, ["lat", "long"])
+            batch = []
+
+    Request.objects.bulk_update(batch, ["lat", "long"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0022_hot_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="request",
+            name="lat_value",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name="request",
+            name="long_value",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name="request",
+            name="geohash",
+            field=models.CharField(blank=True, db_index=True, default="", editable=False, max_length=12),
+        ),
+        migrations.RunPython(coordinates_to_numbers, coordinates_to_strings),
+        migrations.AlterField(
+            model_name="request",
+            name="lat",
+            field=models.CharField(default="", max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="request",
+            name="long",
+            field=models.CharField(default="", max_length=256),
+        ),
+        migrations.RemoveField(
+            model_name="request",
+            name="lat",
+        ),
+        migrations.RemoveField(
+            model_name="request",
+            name="long",
+        ),
+        migrations.RenameField(
+            model_name="request",
+            old_name="lat_value",
+            new_name="lat",
+        ),
+        migrations.RenameField(
+            model_name="request",
+            old_name="long_value",
+            new_name="long",
+        ),
+        migrations.AlterField(
+            model_name="request",
+            name="lat",
+            field=models.FloatField(null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AlterField(
+            model_name="request",
+            name="long",
+            field=models.FloatField(null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+    ]
@@ -0,0 +1,60 @@
+import sqlite3
+
+from django.db import migrations
+
+# Migratsiya yaratilgan paytdagi indekslar (project.search dagi keyingi o'zgarishlar bu yerga ta'sir qilmaydi)
+TOKENIZER = "unicode61 remove_diacritics 2 tokenchars ''''''''"
+
+SEARCH_TABLES = [
+    ("Company", "project_company_search", ["name", "stir", "phone_number", "region", "district"]),
+    ("Request", "project_request_search", ["description"]),
+    ("News", "project_news_search", ["title", "description"]),
+]
+
+
+def fts5_supported(connection):
+    if connection.vendor != "sqlite":
+        return False
+
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE fts5_check USING fts5(value)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+
+    if not fts5_supported(connection):
+        return
+
+    for model_name, table, fields in SEARCH_TABLES:
+        model = apps.get_model("project", model_name)
+        columns = ", ".join(fields)
+        source = ", ".join(f"COALESCE({connection.ops.quote_name(model._meta.get_field(field).column)}, '')" for field in fields)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns}, tokenize='{TOKENIZER}', prefix='2 3')")
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f"INSERT INTO {table} (rowid, {columns}) SELECT id, {source} FROM {model._meta.db_table}")
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for model_name, table, fields in SEARCH_TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0024_image_variants"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.5 on 2026-10-18 00:27
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Migratsiya yaratilgan paytdagi o'lchovlar (project.stats.DIMENSIONS)
+DIMENSIONS = {
+    "priority": "priority",
+    "department": "company__department_id",
+    "region": "company__region",
+    "performer": "performer_id",
+}
+
+
+def build_counters(apps, schema_editor):
+    Request = apps.get_model("project", "Request")
+    RequestCounter = apps.get_model("project", "RequestCounter")
+    counters = []
+
+    for dimension, path in DIMENSIONS.items():
+        rows = Request.objects.order_by().values_list(path, "status").annotate(count=Count("id"))
+        counters += [RequestCounter(dimension=dimension, key="" if key is None else str(key), status=status, count=count) for key, status, count in rows]
+
+    RequestCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0025_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=32)),
+                ('key', models.CharField(max_length=128)),
+                ('status', models.CharField(max_length=150)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key', 'status'), name='request_counter_unique')],
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 01:12
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_expires_at(apps, schema_editor):
+    OTP = apps.get_model("project", "OTP")
+    OTP.objects.update(expires_at=F("created_at") + settings.OTP_LIFETIME)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0027_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otp',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_expires_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 00:50
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_stirs(apps, schema_editor):
+    # Kompaniyalar avtomatik birlashtirilmaydi: ularning so'rovlari va tokenlari bor
+    Company = apps.get_model("project", "Company")
+    duplicates = list(Company.objects.values("stir").annotate(count=Count("id")).filter(count__gt=1).values_list("stir", flat=True)[:20])
+
+    if duplicates:
+        raise RuntimeError(f"Takrorlangan STIR lar bor, migratsiyadan oldin birlashtiring: {', '.join(duplicates)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0028_otp_expires_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_stirs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='company',
+            name='stir',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -1,11 +1,48 @@
 import hashlib
+import heapq
 import uuid
-from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
 from django.utils.timezone import now
 
+from .geo import bounding_box, covering_geohashes, encode_geohash, haversine
+
+
+class TrackedFieldsMixin:
+    """
+    `tracked_fields` ning bazadan o'qilgan qiymatlarini eslab qoladi, saqlashda nima o'zgarganini aniqlash uchun.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_tracked_fields()
+        return instance
+
+    def remember_tracked_fields(self):
+        self._original = {field: self.__dict__[field] for field in self.tracked_fields if field in self.__dict__}
+
+    def get_original(self, field):
+        return getattr(self, "_original", {}).get(field, getattr(self, field))
+
+    def get_changes(self):
+        """
+        Bazadan o'qilgandan beri o'zgargan kuzatiladigan maydonlar: {"status": {"old": ..., "new": ...}}.
+        """
+        original = getattr(self, "_original", {})
+
+        return {
+            field.removesuffix("_id"): {"old": original[field], "new": getattr(self, field)}
+            for field in self.tracked_fields
+            if field in original and original[field] != getattr(self, field)
+        }
+
 
 class Department(models.Model):
     name = models.CharField(max_length=512)
@@ -56,6 +93,7 @@ class Employee(AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(max_length=255, blank=True, null=True)
     last_name = models.CharField(max_length=255, blank=True, null=True)
     image = models.ImageField(default="images/default-user.png", upload_to="employee-images", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     passport = models.CharField(max_length=15, null=True, blank=True, default=None)
 
@@ -91,11 +129,11 @@ class CompanyType(models.Model):
         return self.name
 
 
-class Company(models.Model):
+class Company(TrackedFieldsMixin, models.Model):
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
-    stir = models.CharField(max_length=64)
-    phone_number = models.CharField(max_length=13, null=True, blank=True, default=None)
+    stir = models.CharField(max_length=64, unique=True)
+    phone_number = models.CharField(max_length=13, null=True, blank=True, default=None, db_index=True)
     status = models.CharField(max_length=16)
 
     region = models.CharField(max_length=128)
@@ -103,19 +141,76 @@ class Company(models.Model):
 
     company_type = models.ForeignKey(CompanyType, on_delete=models.PROTECT)
 
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Statistika hisoblagichlari bo'lim va viloyat bo'yicha ham yuritiladi
+    tracked_fields = ("department_id", "region")
+
     def __str__(self) -> str:
         return self.name
 
 
-class Request(models.Model):
+class RequestQuerySet(models.QuerySet):
+    def for_serialization(self, company=True):
+        """
+        RequestSerializer uchun kerakli barcha bog'lanishlarni oldindan yuklash.
+        """
+        related = ["uploader__department", "performer__department"]
+
+        if company:
+            related += ["company__department", "company__company_type"]
+
+        return self.select_related(*related).prefetch_related(self.images_prefetch())
+
+    @staticmethod
+    def images_prefetch(lookup="images"):
+        return models.Prefetch(lookup, queryset=RequestImage.objects.only("id", "request_id", "image", "image_variants").order_by("id"))
+
+    def within_box(self, lat, long, radius):
+        """
+        Avval geohash indeksi, keyin koordinatalar bo'yicha to'rtburchak filtri.
+        """
+        box = bounding_box(lat, long, radius)
+        cells = Q()
+
+        for prefix in covering_geohashes(box):
+            cells |= Q(geohash__gte=prefix, geohash__lt=prefix + "~")
+
+        min_lat, min_long, max_lat, max_long = box
+        return self.filter(cells, lat__range=(min_lat, max_lat), long__range=(min_long, max_long))
+
+    def nearby(self, lat, long, radius, limit=None):
+        """
+        Radius (metr) ichidagi eng yaqin `limit` ta so'rov, masofa bo'yicha saralangan. Har biriga `distance` qo'shiladi.
+
+        Avval to'rtburchakdagi faqat (id, lat, long) o'qiladi, to'liq obyektlar (bog'lanishlar bilan) faqat tanlanganlar uchun.
+        """
+        candidates = self.select_related(None).prefetch_related(None).order_by().within_box(lat, long, radius).values_list("id", "lat", "long")
+        distances = ((haversine(lat, long, item_lat, item_long), pk) for pk, item_lat, item_long in candidates.iterator())
+        distances = [item for item in distances if item[0] <= radius]
+
+        nearest = heapq.nsmallest(limit, distances) if limit is not None else sorted(distances)
+        items = self.in_bulk([pk for distance, pk in nearest])
+
+        results = []
+        for distance, pk in nearest:
+            if pk in items:
+                items[pk].distance = distance
+                results.append(items[pk])
+
+        return results
+
+
+class Request(TrackedFieldsMixin, models.Model):
     uploader = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="uploaded_requests", null=True, blank=True)
     performer = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="performing_requests", null=True, blank=True)
 
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="requests")
-    priority = models.IntegerField()
+    priority = models.IntegerField(db_index=True)
     description = models.TextField()
-    long = models.CharField(max_length=256)
-    lat = models.CharField(max_length=256)
+    long = models.FloatField(null=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    lat = models.FloatField(null=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    geohash = models.CharField(max_length=12, blank=True, default="", db_index=True, editable=False)
     file = models.FileField(blank=True)
     status = models.CharField(
         choices=(
@@ -126,7 +221,43 @@ class Request(models.Model):
         ),
         max_length=150,
         default="pending",
+        db_index=True,
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = RequestQuerySet.as_manager()
+
+    # O'zgarishi kuzatiladigan maydonlar (realtime hodisalar va statistika hisoblagichlari uchun)
+    tracked_fields = ("status", "performer_id", "priority", "company_id")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["company", "status"], name="request_company_status_idx"),
+            models.Index(fields=["performer", "status"], name="request_performer_status_idx"),
+            models.Index(fields=["uploader", "status"], name="request_uploader_status_idx"),
+        ]
+
+    def update_geohash(self):
+        """
+        save() chaqirilmaydigan joylarda (bulk_create) ham chaqirilishi kerak.
+        """
+        has_coordinates = self.lat is not None and self.long is not None
+        self.geohash = encode_geohash(float(self.lat), float(self.long)) if has_coordinates else ""
+
+    def save(self, *args, **kwargs):
+        self.update_geohash()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # auto_now maydoni update_fields da bo'lmasa yangilanmaydi (ETag ham o'zgarmay qoladi)
+            update_fields = {*update_fields, "updated_at"}
+
+            if {"lat", "long"} & update_fields:
+                update_fields.add("geohash")
+
+            kwargs["update_fields"] = update_fields
+
+        return super().save(*args, **kwargs)
 
     def __str__(self):
         return self.company.name
@@ -135,15 +266,55 @@ class Request(models.Model):
 class RequestImage(models.Model):
     request = models.ForeignKey(Request, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="request-images/")
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    def touch_parent(self):
+        # Rasmlar so'rov javobining bir qismi, ETag o'zgarishi uchun
+        Request.objects.filter(pk=self.request_id).update(updated_at=now())
+
+
+class OTPQuerySet(models.QuerySet):
+    def issue(self, company, code):
+        """
+        Kompaniyaning yangi kodi (eskisi almashtiriladi).
+        """
+        created_at = now()
+        return self.update_or_create(company=company, defaults={"code": code, "created_at": created_at, "expires_at": created_at + settings.OTP_LIFETIME})
+
+    def active(self):
+        return self.filter(expires_at__gt=now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=now())
+
+    def purge_expired(self, batch_size=5000):
+        """
+        Muddati o'tgan kodlarni `batch_size` tadan o'chiradi: har bir partiya alohida qisqa DELETE.
+        """
+        expired = self.filter(expires_at__lte=now())
+        total = 0
+
+        while True:
+            deleted, _ = self.filter(pk__in=expired.values("pk")[:batch_size]).delete()
+            total += deleted
+
+            if deleted < batch_size:
+                return total
 
 
 class OTP(models.Model):
     company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name="otp")
     code = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = OTPQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["company", "code"], name="otp_company_code_idx")]
 
     def is_expired(self):
-        return now() > self.created_at + timedelta(minutes=5)
+        return now() >= self.expires_at
 
     def __str__(self):
         return f"OTP for {self.company.phone_number}"
@@ -168,11 +339,66 @@ class CompanyToken(models.Model):
         return f"Token for {self.company.name}"
 
 
-class News(models.Model):
+class News(TrackedFieldsMixin, models.Model):
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
     image = models.ImageField(upload_to="news-images/", null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     title = models.CharField(max_length=512)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Yangilik boshqa bo'limga o'tsa ikkala bo'lim lentasi ham yangilanadi
+    tracked_fields = ("department_id",)
 
     def __str__(self):
         return self.title
+
+
+class OutboundMessage(models.Model):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    chat_id = models.CharField(max_length=64)
+    thread_id = models.IntegerField(null=True, blank=True)
+    text = models.TextField()
+    parse_mode = models.CharField(max_length=16, default="HTML")
+
+    status = models.CharField(
+        choices=((PENDING, "PENDING"), (SENDING, "SENDING"), (SENT, "SENT"), (FAILED, "FAILED")),
+        max_length=16,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    claim = models.CharField(max_length=32, blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"Message #{self.pk} to {self.chat_id} ({self.status})"
+
+
+class RequestCounter(models.Model):
+    """
+    So'rovlar soni o'lchov (`dimension`) qiymati va holat kesimida. Signallar orqali o'sib/kamayib boradi,
+    `rebuild_request_stats` buyrug'i noldan qayta hisoblaydi.
+    """
+
+    dimension = models.CharField(max_length=32)
+    key = models.CharField(max_length=128)
+    status = models.CharField(max_length=150)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["dimension", "key", "status"], name="request_counter_unique")]
+
+    def __str__(self):
+        return f"{self.dimension}={self.key} [{self.status}]: {self.count}"
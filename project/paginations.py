@@ -1,20 +1,189 @@
-import math
+import base64
 import json
+import math
 
-from rest_framework.pagination import PageNumberPagination
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.views import Response
 
 
+class KeysetPagination(BasePagination):
+    """
+    Kursor (keyset) asosidagi paginatsiya.
+
+    OFFSET o'rniga oxirgi ko'rilgan qatordan keyingi qatorlar `WHERE` orqali olinadi,
+    COUNT(*) esa faqat `?with_count=true` bo'lganda hisoblanadi.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    ordering_query_param = "order_by"
+    count_query_param = "with_count"
+    orderings = {
+        "id": ("id",),
+        "priority": ("priority", "id"),
+    }
+    default_ordering = "id"
+    invalid_cursor_message = "Kursor noto'g'ri."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering_name = self.get_ordering_name(request)
+        self.ordering = self.orderings[self.ordering_name]
+        self.count = None
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor["reverse"])
+
+        if self.with_count(request):
+            self.count = queryset.count()
+
+        if cursor:
+            queryset = queryset.filter(self.keyset_filter(cursor["position"], reverse))
+
+        order_by = [f"-{field}" if reverse else field for field in self.ordering]
+        results = list(queryset.order_by(*order_by)[: self.page_size + 1])
+
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+        if self.count is not None:
+            response["count"] = self.count
+            response["page_count"] = math.ceil(self.count / self.page_size) if self.page_size else 1
+
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_ordering_name(self, request):
+        name = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        return name if name in self.orderings else self.default_ordering
+
+    def with_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in ("1", "true")
+
+    def keyset_filter(self, position, reverse):
+        """
+        (a, b) > (x, y) ko'rinishidagi shartni Q obyektlariga aylantiradi.
+        """
+        lookup = "lt" if reverse else "gt"
+        condition = Q()
+
+        for index, field in enumerate(self.ordering):
+            step = Q(**{f"{field}__{lookup}": position[index]})
+
+            for previous, value in zip(self.ordering[:index], position[:index]):
+                step &= Q(**{previous: value})
+
+            condition |= step
+
+        return condition
+
+    def get_position(self, instance):
+        return [getattr(instance, field) for field in self.ordering]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({"o": self.ordering_name, "p": position, "r": reverse}, separators=(",", ":"))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            ordering, position, reverse = payload["o"], payload["p"], bool(payload["r"])
+
+            if ordering != self.ordering_name or not isinstance(position, list) or len(position) != len(self.ordering) or None in position:
+                raise ValueError
+
+            # Qiymatlar maydon turiga keltiriladi, noto'g'ri turlar filtrda emas shu yerda rad etiladi
+            position = [model._meta.get_field(field).to_python(value) for field, value in zip(self.ordering, position)]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {"position": position, "reverse": reverse}
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+
 class PageSizePagination(PageNumberPagination):
+    """
+    Standart sahifa raqamli paginatsiya. `?pagination=cursor` berilsa KeysetPagination ishlatiladi.
+
+    Qidiruv natijalari (`?q=`, moslik bo'yicha tartiblangan) har doim sahifa raqamlari bilan, kursor tartibni id ga o'zgartirardi.
+    """
+
     page_size_query_param = "page_size"
+    mode_query_param = "pagination"
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+
+        if request.query_params.get(self.mode_query_param) == "cursor" and "search_rank" not in queryset.query.extra_select:
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
+        count = self.page.paginator.count
         page_size = self.get_page_size(self.request) or self.page_size
-        total_pages = math.ceil(self.page.paginator.count / page_size) if page_size else 1
+        total_pages = math.ceil(count / page_size) if page_size else 1
 
         return Response(
             {
-                "count": self.page.paginator.count,
+                "count": count,
                 "next": self.get_next_link(),
                 "previous": self.get_previous_link(),
                 "page_count": total_pages,
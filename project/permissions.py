@@ -21,3 +21,13 @@ class CompanyOrRequestUser(BasePermission):
 
     def has_permission(self, request, view):
         return not isinstance(request.user, AnonymousUser) or request.company
+
+
+class IsDirectorOrAdmin(BasePermission):
+    """
+    Xodim direktor yoki admin bo'lishi kerak.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or user.role == "director"))
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+
+
+class QueryCollector:
+    """
+    `connection.execute_wrapper` uchun: so'rovlar soni, umumiy SQL vaqti va takrorlanuvchi SQL lar.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, limit=5):
+        """
+        Bir necha marta bajarilgan SQL lar (N+1 belgisi), eng ko'p takrorlanganlari birinchi.
+        """
+        return [(sql, count) for sql, count in self.statements.most_common(limit) if count > 1]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class ViewStats:
+    """
+    Har bir view/action uchun oxirgi `max_samples` ta o'lchov.
+    """
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._lock = threading.Lock()
+
+    def record(self, key, duration, queries, sql_duration):
+        with self._lock:
+            self._samples[key].append((duration, queries, sql_duration))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+
+        result = {}
+
+        for key, values in sorted(samples.items()):
+            durations = [value[0] * 1000 for value in values]
+            queries = [value[1] for value in values]
+            sql_durations = [value[2] * 1000 for value in values]
+
+            result[key] = {
+                "requests": len(values),
+                "p50_ms": round(percentile(durations, 0.5), 2),
+                "p90_ms": round(percentile(durations, 0.9), 2),
+                "p99_ms": round(percentile(durations, 0.99), 2),
+                "max_ms": round(max(durations), 2),
+                "avg_queries": round(sum(queries) / len(queries), 2),
+                "max_queries": max(queries),
+                "avg_sql_ms": round(sum(sql_durations) / len(sql_durations), 2),
+            }
+
+        return result
+
+
+view_stats = ViewStats(max_samples=settings.PROFILING.get("MAX_SAMPLES", 1000))
@@ -0,0 +1,161 @@
+import re
+import sqlite3
+from functools import cache, reduce
+from operator import and_, or_
+
+from django.db import connections, router
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Company, News, Request
+
+TOKEN_RE = re.compile(r"\w[\w']*")
+
+# Uzbek so'zlaridagi apostrof (o'zbek, yo'l) so'z ichida qoladi
+TOKENIZER = "unicode61 remove_diacritics 2 tokenchars ''''''''"
+
+
+class SearchIndex:
+    """
+    Model uchun FTS5 jadvali: `rowid` = model `pk`, ustunlar - qidiriladigan maydonlar.
+
+    `weights` bm25 uchun maydonlar og'irligi (masalan nom tavsifdan muhimroq).
+    """
+
+    def __init__(self, model, table, fields, weights=None):
+        self.model = model
+        self.table = table
+        self.fields = fields
+        self.weights = weights or [1] * len(fields)
+
+    def get_connection(self):
+        return connections[router.db_for_write(self.model)]
+
+    def is_available(self, connection=None):
+        return (connection or self.get_connection()).vendor == "sqlite" and fts5_supported()
+
+    def create_sql(self):
+        return f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5({', '.join(self.fields)}, tokenize='{TOKENIZER}', prefix='2 3')"
+
+    def get_values(self, instance):
+        return [str(getattr(instance, field) or "") for field in self.fields]
+
+    def update(self, instances):
+        connection = self.get_connection()
+
+        if not self.is_available(connection) or not instances:
+            return
+
+        columns = ", ".join(self.fields)
+        placeholders = ", ".join(["%s"] * (len(self.fields) + 1))
+
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(instance.pk,) for instance in instances])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, {columns}) VALUES ({placeholders})", [[instance.pk, *self.get_values(instance)] for instance in instances]
+            )
+
+    def delete(self, pk):
+        connection = self.get_connection()
+
+        if self.is_available(connection):
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [pk])
+
+    def rebuild(self, connection=None):
+        """
+        Indeksni jadvaldan to'liq qayta quradi (bulk_create/update signallarsiz o'tgan yozuvlar uchun).
+        """
+        connection = connection or self.get_connection()
+
+        if not self.is_available(connection):
+            return 0
+
+        columns = ", ".join(self.fields)
+        source = ", ".join(f"COALESCE({connection.ops.quote_name(self.model._meta.get_field(field).column)}, '')" for field in self.fields)
+
+        with connection.cursor() as cursor:
+            cursor.execute(self.create_sql())
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(f"INSERT INTO {self.table} (rowid, {columns}) SELECT id, {source} FROM {self.model._meta.db_table}")
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f"SELECT count(*) FROM {self.table}")
+            return cursor.fetchone()[0]
+
+    def search(self, queryset, text):
+        """
+        `text` dagi barcha so'zlar (prefiks bo'yicha) uchraydigan yozuvlar, eng mosi birinchi (`search_rank`).
+        """
+        tokens = [token.lower() for token in TOKEN_RE.findall(text)]
+
+        if not tokens:
+            return queryset
+
+        if not self.is_available(connections[queryset.db]):
+            return self.fallback_search(queryset, tokens)
+
+        match = " ".join(f'"{token}"*' for token in tokens)
+        weights = ", ".join(str(weight) for weight in self.weights)
+
+        return queryset.extra(
+            tables=[self.table],
+            where=[f"{self.table}.rowid = {self.model._meta.db_table}.id", f"{self.table} MATCH %s"],
+            params=[match],
+            select={"search_rank": f"bm25({self.table}, {weights})"},
+        ).order_by("search_rank", "id")
+
+    def fallback_search(self, queryset, tokens):
+        # FTS5 bo'lmagan backendlar uchun: har bir so'z biror maydonda bo'lishi kerak, tartiblash yo'q
+        conditions = [reduce(or_, [Q(**{f"{field}__icontains": token}) for field in self.fields]) for token in tokens]
+        return queryset.filter(reduce(and_, conditions))
+
+
+@cache
+def fts5_supported():
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE fts5_check USING fts5(value)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+SEARCH_INDEXES = {
+    index.model: index
+    for index in (
+        SearchIndex(Company, "project_company_search", ["name", "stir", "phone_number", "region", "district"], weights=[10, 8, 5, 1, 1]),
+        SearchIndex(Request, "project_request_search", ["description"]),
+        SearchIndex(News, "project_news_search", ["title", "description"], weights=[5, 1]),
+    )
+}
+
+
+def get_search_index(model):
+    return SEARCH_INDEXES.get(model)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    `?q=` bo'yicha to'liq matnli qidiruv. Natijalar moslik bo'yicha tartiblanadi.
+    """
+
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        index = get_search_index(queryset.model)
+
+        if not text or index is None:
+            return queryset
+
+        return index.search(queryset, text)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Qidiruv so'zlari (prefiks bo'yicha, barcha so'zlar uchrashi kerak)",
+                "schema": {"type": "string"},
+            }
+        ]
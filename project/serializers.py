@@ -1,23 +1,38 @@
 from rest_framework import serializers
 
+from .fieldsets import DynamicFieldsMixin
+from .images import variant_urls
 from .models import (Company, CompanyType, Department, Employee, News, Request,
                      RequestImage)
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Rasmning kichraytirilgan nusxalari: {"320": URL, "768": URL, ...}.
+    """
+
+    def to_representation(self, value):
+        return variant_urls(value, self.context.get("request"))
+
+
+class DepartmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Department
         fields = "__all__"
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
-    department = DepartmentSerializer(read_only=True)
+    department = serializers.PrimaryKeyRelatedField(read_only=True)
+    image_variants = ImageVariantsField()
+
+    expandable_fields = {"department": DepartmentSerializer}
+    default_expand = ("department",)
 
     class Meta:
         model = Employee
-        fields = ["id", "image", "first_name", "last_name", "role", "phone_number", "region", "district", "password", "passport", "image", "department"]
+        fields = ["id", "image", "image_variants", "first_name", "last_name", "role", "phone_number", "region", "district", "password", "passport", "department"]
 
     def create(self, validated_data):
         employee: Employee = super().create(validated_data)
@@ -39,45 +54,38 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return employee
 
 
-class CompanyTypeSerializer(serializers.ModelSerializer):
+class CompanyTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = CompanyType
         fields = "__all__"
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"department": DepartmentSerializer, "company_type": CompanyTypeSerializer}
+    default_expand = ("department", "company_type")
 
     class Meta:
         model = Company
         fields = ["id", "name", "stir", "status", "region", "district", "phone_number", "company_type", "department"]
 
-    def to_representation(self, instance: Company):
-        data = super().to_representation(instance)
-
-        data["department"] = DepartmentSerializer(instance.department).data
-        data["company_type"] = CompanyTypeSerializer(instance.company_type).data
 
-        return data
-
-
-class RequestSerializer(serializers.ModelSerializer):
+class RequestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     images = serializers.ListField(child=serializers.ImageField(allow_empty_file=False), write_only=True, required=True)
     company = serializers.PrimaryKeyRelatedField(queryset=Company.objects.all())
-    uploader = EmployeeSerializer(read_only=True)
-    performer = EmployeeSerializer(read_only=True)
+    uploader = serializers.PrimaryKeyRelatedField(read_only=True)
+    performer = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    expandable_fields = {"company": CompanySerializer, "uploader": EmployeeSerializer, "performer": EmployeeSerializer}
+    default_expand = ("company", "uploader", "performer")
 
     class Meta:
         model = Request
         fields = ["id", "uploader", "performer", "company", "priority", "description", "long", "lat", "file", "images", "status"]
-
-    def __init__(self, *args, **kwargs):
-        self.exclude_fields = kwargs.pop("exclude_fields", [])
-        super().__init__(*args, **kwargs)
-
-        if self.exclude_fields:
-            for field in self.exclude_fields:
-                self.fields.pop(field)
+        extra_kwargs = {
+            "long": {"required": True, "allow_null": False},
+            "lat": {"required": True, "allow_null": False},
+        }
 
     def create(self, validated_data):
         images = validated_data.pop("images")
@@ -99,15 +107,32 @@ class RequestSerializer(serializers.ModelSerializer):
 
         return super().update(instance, validated_data)
 
+    def wants_images(self):
+        return self.wants("images") or self.wants("image_variants")
+
     def to_representation(self, instance):
         serialized_data = super().to_representation(instance)
 
-        if "company" not in self.exclude_fields:
-            serialized_data["company"] = CompanySerializer(instance.company, context=self.context).data
+        if not self.wants_images():
+            return serialized_data
+
+        request = self.context["request"]
+        images = instance.images.all()
 
-        serialized_data["images"] = [self.context["request"].build_absolute_uri(img.image.url) for img in instance.images.all()]
+        if self.wants("images"):
+            serialized_data["images"] = [request.build_absolute_uri(img.image.url) for img in images]
+        if self.wants("image_variants"):
+            serialized_data["image_variants"] = [variant_urls(img.image_variants, request) for img in images]
         return serialized_data
 
+    def get_query_plan(self, prefix=""):
+        plan = super().get_query_plan(prefix)
+
+        if plan is not None and self.wants_images():
+            plan[2].append(Request.objects.images_prefetch(prefix + "images"))
+
+        return plan
+
 
 class RequestImageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -124,8 +149,18 @@ class PhoneNumberOTPSerializer(serializers.Serializer):
     otp = serializers.IntegerField()
 
 
-class NewsSerializer(serializers.ModelSerializer):
+class NearbyRequestsSerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    long = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=1, max_value=50000, default=1000, help_text="Metrda")
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=50)
+
+
+class NewsSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     department = serializers.IntegerField(source="department_id", read_only=True)
+    image_variants = ImageVariantsField()
+
+    expandable_fields = {"department": DepartmentSerializer}
 
     class Meta:
         model = News
@@ -0,0 +1,113 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import stats
+from .caches import company_token_cache
+from .db import apply_sqlite_pragmas, install_write_tracking
+from .events import publish_request_change
+from .feeds import ALL_DEPARTMENTS, news_feed_cache
+from .images import needs_variants, schedule_variants, variants_generated
+from .models import Company, CompanyToken, Employee, News, Request, RequestImage
+from .search import get_search_index
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    install_write_tracking(connection)
+
+    if connection.vendor == "sqlite":
+        apply_sqlite_pragmas(connection)
+
+
+@receiver([post_save, post_delete], sender=CompanyToken)
+def invalidate_company_token(sender, instance, **kwargs):
+    company_token_cache.invalidate(instance.key)
+    company_token_cache.invalidate_company(instance.company_id)
+
+
+@receiver([post_save, post_delete], sender=Company)
+def invalidate_company(sender, instance, **kwargs):
+    company_token_cache.invalidate_company(instance.pk)
+
+
+@receiver(post_save, sender=RequestImage)
+@receiver(post_save, sender=Employee)
+@receiver(post_save, sender=News)
+def create_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw and needs_variants(instance):
+        schedule_variants(instance)
+
+
+@receiver(post_save, sender=Request)
+def request_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        instance.remember_tracked_fields()
+        return
+
+    if created:
+        stats.request_created([instance])
+        changes = {}
+    else:
+        changes = instance.get_changes()
+        stats.request_changed(instance)
+
+    instance.remember_tracked_fields()
+
+    if changes:
+        transaction.on_commit(partial(publish_request_change, instance, changes))
+
+
+@receiver(pre_delete, sender=Request)
+def request_deleted(sender, instance, **kwargs):
+    # pre_delete: kaskad o'chirishda ham kompaniya hali bazada
+    stats.request_deleted(instance)
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        stats.company_changed(instance)
+
+    instance.remember_tracked_fields()
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Request)
+@receiver(post_save, sender=News)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    index = get_search_index(sender)
+
+    if update_fields is None or set(update_fields) & set(index.fields):
+        index.update([instance])
+
+
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Request)
+@receiver(post_delete, sender=News)
+def delete_from_search_index(sender, instance, **kwargs):
+    get_search_index(sender).delete(instance.pk)
+
+
+@receiver(variants_generated, sender=RequestImage)
+@receiver([post_save, post_delete], sender=RequestImage)
+def touch_request(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.touch_parent()
+
+
+@receiver(variants_generated, sender=News)
+@receiver([post_save, post_delete], sender=News)
+def bump_news_feed(sender, instance, raw=False, **kwargs):
+    departments = {instance.department_id, instance.get_original("department_id"), ALL_DEPARTMENTS}
+    instance.remember_tracked_fields()
+
+    def bump():
+        for department in departments:
+            news_feed_cache.bump(department)
+
+    if not raw:
+        transaction.on_commit(bump)
@@ -0,0 +1,205 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Company, Department, Employee, Request, RequestCounter
+
+# O'lchov -> Request dan qiymat olish yo'li
+DIMENSIONS = {
+    "priority": "priority",
+    "department": "company__department_id",
+    "region": "company__region",
+    "performer": "performer_id",
+}
+
+NO_VALUE = ""
+
+
+def to_key(value):
+    return NO_VALUE if value is None else str(value)
+
+
+def get_company_values(company_id, request=None):
+    # Kompaniya allaqachon yuklangan bo'lsa qo'shimcha so'rov kerak emas
+    company = request._state.fields_cache.get("company") if request is not None else None
+
+    if company is not None and company.pk == company_id:
+        return company.department_id, company.region
+
+    return Company.objects.filter(pk=company_id).values_list("department_id", "region").first() or (None, None)
+
+
+def request_deltas(request, sign=1, original=False, company_values=None):
+    """
+    So'rovning har bir o'lchovdagi hissasi: {(o'lchov, qiymat, holat): +1/-1}.
+    """
+    value = request.get_original if original else lambda field: getattr(request, field)
+    department_id, region = company_values or get_company_values(value("company_id"), request)
+    keys = {"priority": value("priority"), "department": department_id, "region": region, "performer": value("performer_id")}
+
+    return Counter({(dimension, to_key(key), value("status")): sign for dimension, key in keys.items()})
+
+
+def apply_deltas(deltas):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        for (dimension, key, status), delta in deltas.items():
+            counters = RequestCounter.objects.filter(dimension=dimension, key=key, status=status)
+
+            if counters.update(count=F("count") + delta):
+                continue
+
+            try:
+                with transaction.atomic():
+                    RequestCounter.objects.create(dimension=dimension, key=key, status=status, count=delta)
+            except IntegrityError:
+                # Parallel so'rov qatorni allaqachon yaratgan
+                counters.update(count=F("count") + delta)
+
+
+def request_created(requests):
+    deltas = Counter()
+
+    for request in requests:
+        deltas.update(request_deltas(request))
+
+    apply_deltas(deltas)
+
+
+def request_changed(request):
+    changes = request.get_changes()
+
+    if not changes:
+        return
+
+    company_values = None if "company" in changes else get_company_values(request.company_id, request)
+
+    deltas = request_deltas(request, company_values=company_values)
+    deltas.update(request_deltas(request, sign=-1, original=True, company_values=company_values))
+    apply_deltas(deltas)
+
+
+def request_deleted(request):
+    apply_deltas(request_deltas(request, sign=-1, original=True))
+
+
+def company_changed(company):
+    """
+    Kompaniya bo'limi yoki viloyati o'zgarsa, uning so'rovlari hisoblagichlarda ko'chiriladi.
+    """
+    companies_changed({company.pk: company.get_changes()})
+
+
+def companies_changed(changes):
+    """
+    Bir nechta kompaniya uchun: {kompaniya id: get_changes()}. So'rovlar soni bitta GROUP BY bilan olinadi.
+    """
+    changes = {company_id: company_changes for company_id, company_changes in changes.items() if company_changes}
+
+    if not changes:
+        return
+
+    deltas = Counter()
+    statuses = (
+        Request.objects.filter(company_id__in=changes).order_by().values("company_id", "status").annotate(count=Count("id")).values_list("company_id", "status", "count")
+    )
+
+    for company_id, status, count in statuses:
+        for dimension, change in changes[company_id].items():
+            deltas[(dimension, to_key(change["old"]), status)] -= count
+            deltas[(dimension, to_key(change["new"]), status)] += count
+
+    apply_deltas(deltas)
+
+
+def compute_counters():
+    """
+    Hisoblagichlarni noldan GROUP BY lar bilan hisoblaydi: {(o'lchov, qiymat, holat): soni}.
+    """
+    counters = {}
+
+    for dimension, path in DIMENSIONS.items():
+        rows = Request.objects.order_by().values_list(path, "status").annotate(count=Count("id"))
+        counters.update({(dimension, to_key(key), status): count for key, status, count in rows})
+
+    return counters
+
+
+def stored_counters():
+    return {
+        (dimension, key, status): count
+        for dimension, key, status, count in RequestCounter.objects.exclude(count=0).values_list("dimension", "key", "status", "count")
+    }
+
+
+def rebuild_counters():
+    counters = compute_counters()
+
+    with transaction.atomic():
+        RequestCounter.objects.all().delete()
+        RequestCounter.objects.bulk_create(
+            [RequestCounter(dimension=dimension, key=key, status=status, count=count) for (dimension, key, status), count in counters.items()],
+            batch_size=1000,
+        )
+
+    return counters
+
+
+def find_mismatches(expected=None):
+    """
+    Saqlangan va haqiqiy qiymatlar farqi: {(o'lchov, qiymat, holat): (saqlangan, haqiqiy)}.
+    """
+    expected = compute_counters() if expected is None else expected
+    stored = stored_counters()
+
+    return {key: (stored.get(key, 0), expected.get(key, 0)) for key in stored.keys() | expected.keys() if stored.get(key, 0) != expected.get(key, 0)}
+
+
+def get_statistics():
+    """
+    Dashboard uchun: har bir o'lchov qiymati bo'yicha jami va holatlar kesimi.
+    """
+    grouped = defaultdict(lambda: defaultdict(lambda: {"total": 0, "statuses": {}}))
+
+    for (dimension, key, status), count in stored_counters().items():
+        item = grouped[dimension][key]
+        item["total"] += count
+        item["statuses"][status] = count
+
+    # Har bir so'rov har bir o'lchovda bir marta hisoblanadi, umumiy holatlar istalgan o'lchovdan olinadi
+    statuses = Counter()
+    for item in grouped["priority"].values():
+        statuses.update(item["statuses"])
+
+    departments = dict(Department.objects.filter(pk__in=[key for key in grouped["department"] if key]).values_list("id", "name"))
+    performers = {
+        employee.pk: employee.full_name()
+        for employee in Employee.objects.filter(pk__in=[key for key in grouped["performer"] if key]).only("id", "phone_number", "first_name", "last_name")
+    }
+
+    def items(dimension, names=None):
+        rows = []
+
+        for key, item in grouped[dimension].items():
+            row = {"key": key or None}
+
+            if names is not None:
+                row["name"] = names.get(int(key)) if key else None
+
+            rows.append({**row, **item})
+
+        return sorted(rows, key=lambda row: -row["total"])
+
+    return {
+        "total": sum(statuses.values()),
+        "statuses": dict(statuses),
+        "priority": sorted(items("priority"), key=lambda row: int(row["key"])),
+        "department": items("department", departments),
+        "region": items("region"),
+        "performer": items("performer", performers),
+    }
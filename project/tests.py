@@ -1,3 +1,1290 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import async_views, events
+from .caches import company_token_cache
+from .events import ALL_REQUESTS_CHANNEL, InMemoryBroker, company_channel, employee_channel, format_sse
+from .exports import iter_xlsx
+from .feeds import news_feed_cache
+from .images import generate_variants
+from .imports import import_companies, iter_xlsx_rows
+from .messaging import BaseTransport, Dispatcher, LocalTransport, TransportError, dispatcher
+from .middleware import ReplicaPinMiddleware
+from .models import OTP, Company, CompanyToken, CompanyType, Department, Employee, News, OutboundMessage, Request, RequestImage
+from .profiling import view_stats
+from .stats import find_mismatches
+from .throttling import LocalWindowCounter, otp_limiter
+from .utils import RateLimiter, TelegramBotClient, TelegramError
+from .views import get_event_channels
+
+
+def create_department(name="Department", region="Toshkent", district="Chilonzor"):
+    return Department.objects.create(name=name, region=region, district=district)
+
+
+def create_company(department, **kwargs):
+    """
+    Faol test kompaniyasi, maydonlar `kwargs` bilan almashtiriladi.
+    """
+    fields = {"name": "Company", "stir": "123456789", "status": "active", "region": "Toshkent", "district": "Chilonzor", **kwargs}
+
+    if "company_type" not in fields:
+        fields["company_type"], _ = CompanyType.objects.get_or_create(name="MChJ")
+
+    return Company.objects.create(department=department, **fields)
+
+
+class RequestQueryCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        cls.company = create_company(department)
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=department, is_staff=True)
+        cls.token = CompanyToken.objects.create(company=cls.company)
+
+        for i in range(12):
+            request = Request.objects.create(
+                uploader=cls.employee, performer=cls.employee, company=cls.company, priority=i, description="Tavsif", long=69.24, lat=41.29
+            )
+            RequestImage.objects.create(request=request, image=f"request-images/{i}-a.jpg")
+            RequestImage.objects.create(request=request, image=f"request-images/{i}-b.jpg")
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_requests_list_query_count_is_constant(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        small = self.count_queries(client, "/api/requests/?page_size=2")
+        large = self.count_queries(client, "/api/requests/?page_size=12")
+
+        self.assertEqual(small, large)
+
+    def test_company_requests_query_count_is_constant(self):
+        client = APIClient(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        client.get("/api/company-auth/get_me/")
+
+        baseline = self.count_queries(client, "/api/company-auth/requests/")
+
+        for i in range(5):
+            Request.objects.create(company=self.company, priority=i, description="Tavsif", long=69.24, lat=41.29)
+
+        self.assertEqual(baseline, self.count_queries(client, "/api/company-auth/requests/"))
+
+    def test_sparse_fields_trim_columns_and_joins(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get("/api/requests/?page_size=2&fields=id,status,company.name&expand=company")
+
+        self.assertEqual(response.data["results"][0], {"id": response.data["results"][0]["id"], "status": "pending", "company": {"name": "Company"}})
+
+        sql = context.captured_queries[-1]["sql"]
+        self.assertNotIn("project_employee", sql)
+        self.assertNotIn("description", sql)
+        self.assertNotIn("project_requestimage", " ".join(query["sql"] for query in context.captured_queries))
+
+        response = client.get("/api/requests/?page_size=2&expand=")
+        self.assertEqual(response.data["results"][0]["company"], self.company.pk)
+        self.assertEqual(response.data["results"][0]["uploader"], self.employee.pk)
+
+
+class NearbyRequestsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        company = create_company(department)
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=department, is_staff=True)
+
+        # Markazdan shimolga ~0, 111, 222, ... metr
+        for i in range(10):
+            request = Request.objects.create(company=company, priority=i, description=f"{i}", long=69.24, lat=41.29 + i * 0.001)
+            RequestImage.objects.create(request=request, image=f"request-images/{i}.jpg")
+
+        Request.objects.create(company=company, priority=0, description="Uzoq", long=69.5, lat=41.5)
+
+    def test_nearest_within_radius(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        response = client.get("/api/requests/nearby/?lat=41.29&long=69.24&radius=300&limit=5")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["description"] for item in response.data], ["0", "1", "2"])
+        self.assertEqual([item["distance"] for item in response.data], sorted(item["distance"] for item in response.data))
+        self.assertEqual(len(response.data[0]["images"]), 1)
+
+    def test_loads_only_selected_rows(self):
+        with CaptureQueriesContext(connection) as context:
+            items = Request.objects.for_serialization().nearby(41.29, 69.24, 5000, limit=2)
+
+        self.assertEqual([item.description for item in items], ["0", "1"])
+        # Nomzodlar (id, lat, long), tanlangan so'rovlar va rasmlar
+        self.assertEqual(len(context.captured_queries), 3)
+        self.assertNotIn("project_company", context.captured_queries[0]["sql"])
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        company = create_company(department)
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=department, is_staff=True)
+
+        descriptions = ["suv", "suv quvuri yorilgan", "elektr", "suv suv suv", "gaz", "suv bosimi past", "yo'l"]
+        cls.requests = [Request.objects.create(company=company, priority=i % 3, description=text) for i, text in enumerate(descriptions)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def collect(self, url):
+        ids = []
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+
+        return ids, response
+
+    def test_walks_all_pages(self):
+        ids, last = self.collect("/api/requests/?pagination=cursor&page_size=3&order_by=priority")
+        expected = list(Request.objects.order_by("priority", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+        previous = self.client.get(last.data["previous"])
+        self.assertEqual([item["id"] for item in previous.data["results"]], expected[3:6])
+
+    def encode(self, payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def test_invalid_cursors(self):
+        cursors = [
+            "bm90LWpzb24",
+            self.encode([1, 2]),
+            self.encode({"o": "id", "p": 5, "r": False}),
+            self.encode({"o": "id", "p": ["abc"], "r": False}),
+            self.encode({"o": "id", "p": [None], "r": False}),
+            self.encode({"o": "priority", "p": [1, {"id": 1}], "r": False}),
+            self.encode({"o": "priority", "p": [1], "r": False}),
+        ]
+
+        for cursor in cursors:
+            response = self.client.get(f"/api/requests/?pagination=cursor&order_by=priority&cursor={cursor}")
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_search_keeps_rank_order(self):
+        ranked = [item["id"] for item in self.client.get("/api/requests/?q=suv&page_size=10").data["results"]]
+        ids, last = self.collect("/api/requests/?q=suv&page_size=2&pagination=cursor")
+
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(ids, ranked)
+
+
+class CompanyTokenCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company(create_department(), stir="555555555")
+        cls.token = CompanyToken.objects.create(company=cls.company)
+
+    def setUp(self):
+        company_token_cache.clear()
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def token_queries(self, url, **extra):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **extra)
+
+        return response, sum("project_companytoken" in query["sql"] for query in context.captured_queries)
+
+    def test_hit_and_invalidation(self):
+        self.assertEqual(self.token_queries("/api/company-auth/get_me/")[1], 1)
+
+        response, queries = self.token_queries("/api/company-auth/get_me/")
+        self.assertEqual((response.status_code, queries), (200, 0))
+        self.assertEqual(company_token_cache.stats()["hits"], 1)
+
+        self.company.name = "Yangi nom"
+        self.company.save()
+        self.assertEqual(self.client.get("/api/company-auth/get_me/").data["name"], "Yangi nom")
+
+        CompanyToken.objects.filter(pk=self.token.pk).delete()
+        self.assertEqual(self.client.get("/api/company-auth/get_me/").status_code, 403)
+
+    def test_unknown_keys_are_cached(self):
+        client = APIClient(HTTP_AUTHORIZATION="Token noma'lum")
+
+        for _ in range(2):
+            self.assertEqual(client.get("/api/company-auth/get_me/").status_code, 403)
+
+        self.assertEqual(company_token_cache.stats()["misses"], 1)
+
+    def test_jwt_skips_company_lookup(self):
+        response, queries = self.token_queries("/api/company-auth/get_me/", HTTP_AUTHORIZATION="Bearer a.b.c")
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(company_token_cache.stats(), {"hits": 0, "misses": 0, "size": 0})
+
+
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department()
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=cls.department, is_staff=True)
+        News.objects.create(department=cls.department, title="Yangilik", description="Matn")
+
+    def setUp(self):
+        view_stats.clear()
+
+    def test_disabled_by_default(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        self.assertNotIn("Server-Timing", client.get("/api/news/?q=matn"))
+        self.assertEqual(view_stats.summary(), {})
+
+    @override_settings(PROFILING={"ENABLED": True, "SLOW_REQUEST_MS": 0, "TOP_STATEMENTS": 5})
+    def test_records_views_and_slow_requests(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        with self.assertLogs("project.profiling", "WARNING") as logs:
+            response = client.get("/api/news/?q=matn")
+
+        self.assertRegex(response["Server-Timing"], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertIn("news-list", logs.output[0])
+
+        stats = client.get("/api/profiling/stats/").data
+        self.assertEqual(stats["views"]["news-list"]["requests"], 1)
+        self.assertGreater(stats["views"]["news-list"]["max_queries"], 0)
+        self.assertIn("company_token_cache", stats)
+
+        client.force_authenticate(Employee.objects.create_user("+998907654321", "password", department=self.department))
+        self.assertEqual(client.get("/api/profiling/stats/").status_code, 403)
+
+
+class QueryPlanTest(TestCase):
+    def test_hot_queries_use_indexes(self):
+        call_command("explain_queries", "--strict", stdout=StringIO())
+
+
+@override_settings(ROOT_URLCONF="config.asgi_urls")
+class AsyncCompanyAuthTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company(create_department(), stir="987654321", phone_number="+998901112233")
+
+    @mock.patch.object(dispatcher, "transport", LocalTransport())
+    async def test_otp_flow(self):
+        LocalTransport.outbox.clear()
+
+        response = await self.async_client.post("/api/company-auth/send_otp/", {"stir": self.company.stir}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+
+        await asyncio.gather(*async_views._background_tasks)
+        message = await OutboundMessage.objects.aget()
+        self.assertEqual(message.status, OutboundMessage.SENT)
+        self.assertEqual(len(LocalTransport.outbox), 1)
+
+        otp = await OTP.objects.aget(company=self.company)
+        response = await self.async_client.post(
+            "/api/company-auth/verify_otp/", {"phone_number": self.company.phone_number, "otp": otp.code}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["company"]["stir"], self.company.stir)
+
+        response = await self.async_client.get("/api/company-auth/get_me/", headers={"Authorization": f"Token {response.json()['token']}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Company")
+
+    async def test_get_me_requires_company_token(self):
+        async_response = await self.async_client.get("/api/company-auth/get_me/")
+
+        with override_settings(ROOT_URLCONF="config.urls"):
+            sync_response = await sync_to_async(self.client.get)("/api/company-auth/get_me/")
+
+        self.assertEqual(async_response.status_code, 403)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    async def test_verify_otp_rejects_wrong_code(self):
+        response = await self.async_client.post(
+            "/api/company-auth/verify_otp/", {"phone_number": self.company.phone_number, "otp": 111111}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_verify_otp_rejects_expired_code(self):
+        otp, created = await sync_to_async(OTP.objects.issue)(self.company, "123456")
+        await OTP.objects.filter(pk=otp.pk).aupdate(expires_at=otp.created_at)
+
+        response = await self.async_client.post(
+            "/api/company-auth/verify_otp/", {"phone_number": self.company.phone_number, "otp": 123456}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "OTP kodi muddati tugagan.")
+
+
+class OTPExpiryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        cls.companies = [create_company(department, name=f"Company {i}", stir=f"98765432{i}", phone_number=f"+99890111223{i}") for i in range(5)]
+
+    def test_verify_otp_checks_expiry_in_sql(self):
+        OTP.objects.issue(self.companies[0], "123456")
+        data = {"phone_number": self.companies[0].phone_number, "otp": 123456}
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post("/api/company-auth/verify_otp/", data)
+        self.assertEqual(response.status_code, 200)
+
+        # Kod bitta DELETE da tekshiriladi va o'chiriladi
+        otp_queries = [query["sql"] for query in context.captured_queries if "project_otp" in query["sql"]]
+        self.assertEqual(len(otp_queries), 1)
+        self.assertTrue(otp_queries[0].startswith("DELETE") and "expires_at" in otp_queries[0])
+
+        self.assertEqual(self.client.post("/api/company-auth/verify_otp/", data).status_code, 400)
+
+    def test_purge_expired_in_batches(self):
+        for i, company in enumerate(self.companies):
+            otp, created = OTP.objects.issue(company, "123456")
+            if i < 4:
+                OTP.objects.filter(pk=otp.pk).update(expires_at=otp.created_at)
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(OTP.objects.purge_expired(batch_size=3), 4)
+
+        self.assertEqual(len([query for query in context.captured_queries if query["sql"].startswith("DELETE")]), 2)
+        self.assertEqual(list(OTP.objects.values_list("company", flat=True)), [self.companies[4].pk])
+
+        out = StringIO()
+        call_command("purge_expired_otps", "--once", stdout=out)
+        self.assertIn("0 ta", out.getvalue())
+
+
+@mock.patch.object(dispatcher, "transport", LocalTransport())
+class OTPThrottleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company(create_department(), stir="123123123", phone_number="+998907770000")
+
+    def setUp(self):
+        otp_limiter.clear()
+
+    def test_send_otp_limited_per_stir(self):
+        for _ in range(3):
+            self.assertEqual(self.client.post("/api/company-auth/send_otp/", {"stir": self.company.stir}).status_code, 200)
+
+        response = self.client.post("/api/company-auth/send_otp/", {"stir": self.company.stir}, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_forwarded_for_cannot_bypass_ip_limit(self):
+        for i in range(20):
+            self.client.post("/api/company-auth/send_otp/", {"stir": f"{i:09d}"}, HTTP_X_FORWARDED_FOR=f"10.1.0.{i}")
+
+        response = self.client.post("/api/company-auth/send_otp/", {"stir": "999999999"}, HTTP_X_FORWARDED_FOR="10.1.1.1")
+        self.assertEqual(response.status_code, 429)
+
+    def test_brute_force_lockout(self):
+        OTP.objects.issue(self.company, "123456")
+        data = {"phone_number": self.company.phone_number}
+
+        for code in range(100000, 100005):
+            self.assertEqual(self.client.post("/api/company-auth/verify_otp/", {**data, "otp": code}).status_code, 400)
+
+        # Kod bekor qilingan, raqam bloklangan
+        self.assertFalse(OTP.objects.filter(company=self.company).exists())
+        self.assertEqual(self.client.post("/api/company-auth/verify_otp/", {**data, "otp": 123456}).status_code, 429)
+
+    def test_sliding_window(self):
+        counter = LocalWindowCounter()
+
+        self.assertEqual(counter.hit("key", 60, 120), 1)
+        self.assertEqual(counter.hit("key", 60, 150), 2)
+        # Oldingi oynaning yarmi hali hisobda
+        self.assertEqual(counter.hit("key", 60, 210), 2)
+        self.assertEqual(counter.hit("key", 60, 300), 1)
+
+
+class RateLimitedTransport(BaseTransport):
+    def __init__(self, rate_limiter):
+        self.rate_limiter = rate_limiter
+        self.sent = []
+
+    def capacity(self, chat_id, seconds):
+        return self.rate_limiter.capacity(chat_id, seconds)
+
+    def send(self, message):
+        self.sent.append(message.pk)
+
+
+class FailingTransport(BaseTransport):
+    def __init__(self, error):
+        self.error = error
+
+    def send(self, message):
+        raise self.error
+
+
+class OutboundMessageTest(TestCase):
+    def test_claim_is_exclusive_until_lease_expires(self):
+        messages = Dispatcher(transport=LocalTransport(), workers=0, batch_size=10, lock_timeout=60)
+        message = OutboundMessage.objects.create(chat_id="100", text="Kod")
+
+        self.assertEqual([item.pk for item in messages.claim()], [message.pk])
+        self.assertEqual(messages.claim(), [])
+
+        # Band qilgan worker to'xtab qolgan
+        OutboundMessage.objects.filter(pk=message.pk).update(locked_at=now() - timedelta(seconds=61))
+        self.assertEqual([item.pk for item in messages.claim()], [message.pk])
+
+    def test_retry_with_backoff_then_fail(self):
+        messages = Dispatcher(transport=FailingTransport(TransportError("tarmoq")), workers=0, max_attempts=3, backoff=2)
+        message = OutboundMessage.objects.create(chat_id="100", text="Kod")
+
+        started = now()
+        self.assertEqual(messages.drain(), 0)
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), (OutboundMessage.PENDING, 1, "tarmoq"))
+        self.assertAlmostEqual((message.next_attempt_at - started).total_seconds(), 2, delta=1)
+
+        # Kechikish tugamaguncha qayta olinmaydi
+        self.assertEqual(messages.claim(), [])
+
+        messages.transport = FailingTransport(TransportError("429", retry_after=30))
+        OutboundMessage.objects.filter(pk=message.pk).update(next_attempt_at=now())
+        messages.drain()
+
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 2)
+        self.assertAlmostEqual((message.next_attempt_at - now()).total_seconds(), 30, delta=1)
+
+        OutboundMessage.objects.filter(pk=message.pk).update(next_attempt_at=now())
+        messages.drain()
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessage.FAILED, 3))
+
+    def test_rate_limiter_capacity(self):
+        limiter = RateLimiter(global_rate=30, group_rate=20 / 60, private_rate=1)
+
+        # Guruhga har 3 soniyada bittadan: 0, 3, ..., 30
+        self.assertEqual(limiter.capacity("-100", 30), 11)
+        self.assertEqual(limiter.capacity("100", 30), 31)
+
+        for _ in range(5):
+            limiter.delay("-100")
+
+        self.assertEqual(limiter.capacity("-100", 30), 6)
+        self.assertEqual(limiter.capacity("-100", 10), 0)
+
+    def test_claim_fits_in_lease(self):
+        transport = RateLimitedTransport(RateLimiter(group_rate=20 / 60))
+        messages = Dispatcher(transport=transport, workers=0, batch_size=50, lock_timeout=60)
+
+        for i in range(30):
+            OutboundMessage.objects.create(chat_id="-100", text=f"Xabar {i}")
+        OutboundMessage.objects.create(chat_id="100", text="Shaxsiy")
+
+        batch = messages.claim()
+        self.assertEqual(len(batch), 12)
+        self.assertEqual(sum(message.chat_id == "-100" for message in batch), 11)
+
+        # Band qilingan, lekin hali yuborilmagan xabarlar boshqa threadga berilmaydi
+        self.assertEqual(messages.claim(), [])
+
+        messages.release(batch)
+        self.assertEqual(len(messages.claim()), 11)
+
+    async def test_adeliver_leaves_rate_limited_message_to_workers(self):
+        limiter = RateLimiter(group_rate=20 / 60)
+        messages = Dispatcher(transport=RateLimitedTransport(limiter), workers=0, lock_timeout=60)
+        message = await OutboundMessage.objects.acreate(chat_id="-100", text="Kod")
+
+        # Keyingi bo'sh joy 33 soniyadan keyin, band qilish muddatining yarmidan oshadi
+        for _ in range(11):
+            limiter.delay("-100")
+
+        self.assertFalse(await messages.adeliver(message))
+        self.assertEqual((await OutboundMessage.objects.aget(pk=message.pk)).status, OutboundMessage.PENDING)
+
+        messages.transport.rate_limiter = RateLimiter(group_rate=20 / 60)
+        self.assertTrue(await messages.adeliver(message))
+        self.assertEqual(messages.transport.sent, [message.pk])
+
+    def test_send_batch_handles_non_json_429(self):
+        client = TelegramBotClient("token")
+        responses = [requests.Response(), requests.Response()]
+
+        responses[0].status_code, responses[0]._content, responses[0].headers["Retry-After"] = 429, b"Too Many Requests", "7"
+        responses[1].status_code, responses[1]._content = 200, b'{"ok": true, "result": {"message_id": 1}}'
+
+        with mock.patch.object(client.session, "post", side_effect=responses):
+            results = client.send_batch([{"chat_id": "1", "text": "a"}])
+            self.assertIsInstance(results[0], TelegramError)
+            self.assertEqual(results[0].retry_after, 7)
+
+            self.assertEqual(client.send_message("1", "b"), {"message_id": 1})
+
+
+class FullTextSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=department, is_staff=True)
+
+        cls.railways = create_company(department, name="O'zbekiston temir yo'llari", stir="200000001")
+        cls.bakery = create_company(department, name="Non zavodi", stir="200000002", district="Temirchilar")
+        create_company(department, name="Suv ta'minoti", stir="200000003")
+
+        News.objects.create(department=department, title="Yangi bino", description="Bo'lim yangi binoga ko'chdi")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def search(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_prefix_search_ranks_name_matches_first(self):
+        self.assertEqual(self.search("/api/companies/?q=temir"), [self.railways.pk, self.bakery.pk])
+        self.assertEqual(self.search("/api/companies/?q=o'zbek yo'l"), [self.railways.pk])
+        self.assertEqual(self.search("/api/companies/?q=2000000"), self.search("/api/companies/?q=toshkent"))
+
+    def test_index_follows_changes(self):
+        self.bakery.name = "Temir beton"
+        self.bakery.save()
+        self.assertEqual(self.search("/api/companies/?q=beton"), [self.bakery.pk])
+
+        self.bakery.delete()
+        self.assertEqual(self.search("/api/companies/?q=beton"), [])
+
+        news = News.objects.get()
+        self.assertEqual(self.search("/api/news/?q=bino"), [news.pk])
+
+
+class RequestStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department()
+        cls.other_department = create_department("Other", "Samarqand", "Urgut")
+        cls.company = create_company(cls.department)
+        cls.director = Employee.objects.create_user("+998901234567", "password", department=cls.department, role="director")
+        cls.employee = Employee.objects.create_user("+998901234568", "password", department=cls.department, role="employee")
+
+    def create_request(self, **kwargs):
+        return Request.objects.create(company=self.company, priority=kwargs.pop("priority", 1), description="Tavsif", long=69.24, lat=41.29, **kwargs)
+
+    def get_stats(self):
+        client = APIClient()
+        client.force_authenticate(self.director)
+        response = client.get("/api/requests/stats/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_counters_follow_request_changes(self):
+        first = self.create_request()
+        second = self.create_request(priority=3)
+        self.create_request(priority=3, status="accepted")
+
+        first.status = "accepted"
+        first.save()
+
+        client = APIClient()
+        client.force_authenticate(self.director)
+        response = client.put(f"/api/requests/{second.pk}/assign/", {"employee_id": self.employee.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        self.company.department = self.other_department
+        self.company.region = "Samarqand"
+        self.company.save()
+
+        Request.objects.get(pk=second.pk).delete()
+        self.assertEqual(find_mismatches(), {})
+
+        data = self.get_stats()
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(data["statuses"], {"accepted": 2})
+        self.assertEqual([(row["key"], row["total"]) for row in data["priority"]], [("1", 1), ("3", 1)])
+        self.assertEqual([(row["name"], row["total"]) for row in data["department"]], [("Other", 2)])
+        self.assertEqual([(row["key"], row["total"]) for row in data["region"]], [("Samarqand", 2)])
+
+    def test_bulk_changes_are_fixed_by_rebuild(self):
+        self.create_request()
+        Request.objects.update(status="rejected")
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_request_stats", "--verify", stdout=StringIO())
+
+        call_command("rebuild_request_stats", stdout=StringIO())
+        call_command("rebuild_request_stats", "--verify", stdout=StringIO())
+        self.assertEqual(self.get_stats()["statuses"], {"rejected": 1})
+
+    def test_only_directors_and_admins(self):
+        client = APIClient()
+        client.force_authenticate(self.employee)
+        self.assertEqual(client.get("/api/requests/stats/").status_code, 403)
+
+
+class RequestEventsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        cls.company = create_company(department)
+        cls.token = CompanyToken.objects.create(company=cls.company)
+        cls.director = Employee.objects.create_user("+998901234567", "password", department=department, role="director", is_staff=True)
+        cls.employee = Employee.objects.create_user("+998901234568", "password", department=department, role="employee")
+
+    def get_channels(self, path="/api/requests/events/", **headers):
+        request = RequestFactory().get(path, headers=headers)
+        request.company = None
+        return get_event_channels(request)
+
+    def test_channels_by_credentials(self):
+        self.assertEqual(self.get_channels(), [])
+        self.assertEqual(self.get_channels(Authorization=f"Token {self.token.key}"), [company_channel(self.company.pk)])
+        self.assertEqual(self.get_channels(f"/api/requests/events/?token={self.token.key}"), [company_channel(self.company.pk)])
+        self.assertEqual(self.get_channels(Authorization="Token unknown"), [])
+
+        access = RefreshToken.for_user(self.director).access_token
+        self.assertEqual(self.get_channels(f"/api/requests/events/?token={access}"), [employee_channel(self.director.pk), ALL_REQUESTS_CHANNEL])
+
+        access = RefreshToken.for_user(self.employee).access_token
+        self.assertEqual(self.get_channels(Authorization=f"Bearer {access}"), [employee_channel(self.employee.pk)])
+        self.assertEqual(self.get_channels(Authorization=f"Bearer {str(access)[:-2]}xx"), [])
+
+    def test_request_change_is_published(self):
+        request = Request.objects.create(company=self.company, priority=1, description="Tavsif", long=69.24, lat=41.29)
+
+        with mock.patch.object(events, "broker") as broker, self.captureOnCommitCallbacks(execute=True):
+            request.performer = self.employee
+            request.status = "accepted"
+            request.save()
+
+        channels = {call.args[0] for call in broker.publish.call_args_list}
+        self.assertEqual(channels, {company_channel(self.company.pk), employee_channel(self.employee.pk), ALL_REQUESTS_CHANNEL})
+
+        event = broker.publish.call_args.args[1]
+        self.assertEqual((event["type"], event["request"], event["status"], event["performer"]), ("request.updated", request.pk, "accepted", self.employee.pk))
+
+    def test_format_sse(self):
+        self.assertEqual(format_sse({"type": "request.updated", "status": "qabul"}), 'event: request.updated\ndata: {"type": "request.updated", "status": "qabul"}\n\n')
+
+
+class InMemoryBrokerTest(SimpleTestCase):
+    async def test_publish_from_thread(self):
+        broker = InMemoryBroker()
+        subscription = broker.subscribe([company_channel(1), ALL_REQUESTS_CHANNEL])
+
+        await asyncio.to_thread(broker.publish, company_channel(1), {"type": "request.updated"})
+        broker.publish(company_channel(2), {"type": "other"})
+
+        self.assertEqual(await subscription.get(timeout=1), {"type": "request.updated"})
+        self.assertIsNone(await subscription.get(timeout=0.01))
+        self.assertEqual(broker.subscriber_count(ALL_REQUESTS_CHANNEL), 1)
+
+        subscription.close()
+        self.assertEqual(broker.subscriber_count(company_channel(1)), 0)
+        self.assertEqual(broker._subscribers, {})
+
+    async def test_slow_subscriber_drops_oldest(self):
+        broker = InMemoryBroker(queue_size=2)
+        subscription = broker.subscribe([ALL_REQUESTS_CHANNEL])
+
+        for i in range(3):
+            broker.publish(ALL_REQUESTS_CHANNEL, {"type": "request.updated", "request": i})
+
+        self.assertEqual([(await subscription.get(timeout=1))["request"] for _ in range(2)], [1, 2])
+        self.assertIsNone(await subscription.get(timeout=0.01))
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        company = create_company(department)
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=department, is_staff=True)
+        cls.other = Employee.objects.create_user("+998907654321", "password", department=department)
+
+        Request.objects.create(company=company, uploader=cls.employee, priority=1, description='Tavsif, "qo\'shtirnoq"', long=69.24, lat=41.29)
+        Request.objects.create(company=company, uploader=cls.other, priority=2, description="Boshqa\x01", long=None, lat=None)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_applies_filters(self):
+        response, content = self.download(f"/api/requests/export/?uploader={self.employee.pk}")
+
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="requests.csv"')
+        rows = list(csv.reader(StringIO(content.decode("utf-8-sig"))))
+        self.assertEqual(rows[0][:4], ["ID", "Kompaniya", "STIR", "Muhimligi"])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][4], 'Tavsif, "qo\'shtirnoq"')
+
+    def test_xlsx(self):
+        response, content = self.download("/api/requests/export/?file_format=xlsx")
+        rows = list(iter_xlsx_rows(BytesIO(content)))
+
+        self.assertEqual(len(rows), 3)
+        # Son kataklar son bo'lib, XML da taqiqlangan belgilar olib tashlanadi
+        self.assertEqual((rows[1][3], rows[2][3], rows[2][4], rows[2][5]), ("1", "2", "Boshqa", ""))
+
+    def test_invalid_format_and_permissions(self):
+        self.assertEqual(self.client.get("/api/requests/export/?file_format=pdf").status_code, 400)
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get("/api/requests/export/").status_code, 403)
+
+
+class BulkCreateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = create_department()
+        cls.company = create_company(department)
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=department, is_staff=True)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def image(self, name):
+        buffer = BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, format="PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def test_partial_success(self):
+        item = {"company": self.company.pk, "priority": 1, "lat": 41.29, "long": 69.24}
+        items = [{**item, "description": "Quvur yorilgan"}, {**item, "description": "Koordinatasiz", "lat": None}, {**item, "description": "Yo'l"}]
+        data = {"items": json.dumps(items), "images[0]": [self.image("a.png"), self.image("b.png")], "images[1]": [self.image("c.png")], "images[2]": [self.image("d.png")]}
+
+        response = self.client.post("/api/requests/bulk_create/", data, format="multipart")
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([result["status"] for result in response.data["results"]], ["created", "error", "created"])
+        self.assertIn("lat", response.data["results"][1]["errors"])
+
+        created = Request.objects.get(pk=response.data["results"][0]["id"])
+        self.assertEqual((created.uploader, created.images.count()), (self.employee, 2))
+        self.assertTrue(created.geohash)
+
+        # bulk_create signallarsiz: qidiruv indeksi va statistika hisoblagichlari qo'lda yangilanadi
+        self.assertEqual(self.client.get("/api/requests/?q=quvur").data["count"], 1)
+        self.assertEqual(find_mismatches(), {})
+
+    def test_invalid_items(self):
+        for items in ["[", "{}", "[]", json.dumps([{}] * 101)]:
+            response = self.client.post("/api/requests/bulk_create/", {"items": items}, format="multipart")
+            self.assertEqual(response.status_code, 400, items)
+
+        self.assertFalse(Request.objects.exists())
+
+
+class CompanyImportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department()
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=cls.department, is_staff=True)
+
+        cls.company = create_company(cls.department, name="Eski", stir="111111111")
+        cls.company_type = cls.company.company_type
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def upload(self, content, name="companies.csv"):
+        return self.client.post("/api/companies/import/", {"file": SimpleUploadedFile(name, content)}, format="multipart")
+
+    def test_csv_creates_updates_and_reports_errors(self):
+        content = (
+            "name,stir,phone_number,status,region,district,company_type,department\n"
+            "Yangi,222222222,+998901112233,active,Toshkent,Yunusobod,mchj,Department\n"
+            f"Yangilangan,111111111,,inactive,Toshkent,Chilonzor,{self.company_type.pk},{self.department.pk}\n"
+            "Xato,,,active,Toshkent,Chilonzor,MChJ,Noma'lum\n"
+            "Takror,222222222,,active,Toshkent,Chilonzor,MChJ,Department\n"
+        )
+        response = self.upload(content.encode())
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data["total"], response.data["created"], response.data["updated"]), (4, 1, 1))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [4, 5])
+        self.assertEqual(set(response.data["errors"][0]["errors"]), {"stir", "department"})
+
+        self.company.refresh_from_db()
+        self.assertEqual((self.company.name, self.company.status), ("Yangilangan", "inactive"))
+        self.assertEqual(Company.objects.get(stir="222222222").phone_number, "+998901112233")
+        self.assertEqual(self.client.get("/api/companies/?q=Yangilangan").data["count"], 1)
+
+    def test_xlsx_export_roundtrip(self):
+        header = ["ID", "Nomi", "STIR", "Telefon", "Holati", "Viloyat", "Tuman", "Turi", "Bo'lim"]
+        rows = [[None, "Yangi", 333333333, None, "active", "Toshkent", "Yunusobod", "MChJ", "Department"]]
+        content = b"".join(iter_xlsx(header, rows))
+
+        response = self.upload(content, name="companies.xlsx")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+
+        # Eksport qilingan fayl qayta yuklanganda faqat yangilanadi
+        export = b"".join(self.client.get("/api/companies/export/?file_format=xlsx").streaming_content)
+        report = import_companies(BytesIO(export))
+        self.assertEqual((report["created"], report["updated"], report["error_count"]), (0, 2, 0))
+
+    def test_malformed_files(self):
+        content = "name,stir,phone_number,status,region,district,company_type,department\nКомпания,444444444,,active,Toshkent,Chilonzor,MChJ,Department\n"
+        response = self.upload(content.encode("cp1251"))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data["file_error"])
+        self.assertEqual(response.data["errors"][0]["errors"], {"file": ["Fayl UTF-8 kodirovkasida emas."]})
+
+        response = self.upload(b"name,stir\n", name="companies.xlsx")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0]["errors"], {"file": ["Fayl XLSX formatida emas yoki buzilgan."]})
+
+    def test_missing_columns(self):
+        response = self.upload(b"name,stir\nA,1\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("department", response.data["errors"][0]["errors"])
+
+
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANTS={"SIZES": [320], "FORMAT": "JPEG", "ASYNC": False})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        os.makedirs(os.path.join(self.media_root, "images"))
+        Image.new("RGB", (800, 600), "white").save(os.path.join(self.media_root, "images", "default-user.png"))
+
+        department = create_department()
+        self.employees = [Employee.objects.create_user(f"+99890000000{i}", "password", department=department) for i in range(2)]
+
+    def upload(self, employee, name):
+        buffer = BytesIO()
+        Image.new("RGB", (800, 600), "red").save(buffer, format="PNG")
+
+        employee.image = SimpleUploadedFile(name, buffer.getvalue())
+        employee.save()
+        return generate_variants(employee)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def test_shared_default_variants_are_kept(self):
+        shared = [generate_variants(employee) for employee in self.employees]
+        self.assertEqual(shared[0], shared[1])
+        self.assertEqual(shared[0]["sizes"], {"320": "images/variants/default-user_320.jpg"})
+
+        own = self.upload(self.employees[0], "photo.png")
+        self.assertTrue(self.exists(own["sizes"]["320"]))
+        self.assertTrue(self.exists(shared[1]["sizes"]["320"]))
+
+        # O'ziga tegishli eski nusxalar o'chiriladi
+        newer = self.upload(self.employees[0], "photo.png")
+        self.assertNotEqual(newer["sizes"], own["sizes"])
+        self.assertFalse(self.exists(own["sizes"]["320"]))
+        self.assertTrue(self.exists(shared[1]["sizes"]["320"]))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department()
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=cls.department, is_staff=True)
+        cls.news = News.objects.create(department=cls.department, title="Yangilik", description="Matn")
+
+    def setUp(self):
+        news_feed_cache.cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def test_list_etag(self):
+        response = self.client.get("/api/news/")
+        etag = response["ETag"]
+
+        # Lenta keshidan: bazaga so'rov yo'q
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/news/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            News.objects.create(department=self.department, title="Yana", description="Matn")
+        self.assertEqual(self.client.get("/api/news/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_etag_and_last_modified(self):
+        url = f"/api/news/{self.news.pk}/"
+        response = self.client.get(url)
+        self.assertIn("Last-Modified", response)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+
+        self.news.title = "Yangilandi"
+        self.news.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_malformed_pk_returns_404(self):
+        for url in ("/api/news/abc/", "/api/requests/abc/", "/api/companies/abc/"):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+    def test_list_etag_depends_on_query_params(self):
+        etag = self.client.get("/api/news/?q=matn&page_size=1")["ETag"]
+
+        self.assertEqual(self.client.get("/api/news/?q=matn&page_size=1", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get("/api/news/?q=matn&page_size=2", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_assign_changes_request_etags(self):
+        company = create_company(self.department)
+        request = Request.objects.create(company=company, priority=1, description="Tavsif", long=69.24, lat=41.29)
+        performer = Employee.objects.create_user("+998907654321", "password", department=self.department)
+
+        urls = ["/api/requests/", f"/api/requests/{request.pk}/"]
+        etags = [self.client.get(url)["ETag"] for url in urls]
+
+        response = self.client.put(f"/api/requests/{request.pk}/assign/", {"employee_id": performer.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+
+class NewsFeedCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department()
+        cls.other_department = create_department("Other", "Samarqand", "Urgut")
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=cls.department, is_staff=True)
+        News.objects.create(department=cls.department, title="Birinchi", description="Matn")
+
+    def setUp(self):
+        news_feed_cache.cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+        patcher = mock.patch.object(news_feed_cache, "background", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [item["title"] for item in response.data["results"]]
+
+    def test_cached_pages_skip_serialization(self):
+        url = f"/api/news/?department={self.department.pk}"
+        self.assertEqual(self.get_titles(url), ["Birinchi"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_titles(url), ["Birinchi"])
+
+    def test_conditional_get_follows_version(self):
+        url = f"/api/news/?department={self.department.pk}"
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        news = News.objects.get()
+        news.title = "Yangilandi"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            news.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["title"] for item in response.data["results"]], ["Yangilandi"])
+
+    def test_write_bumps_version_and_warms_feed(self):
+        url = f"/api/news/?department={self.department.pk}"
+        self.get_titles(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/news/", {"title": "Ikkinchi", "description": "Matn"})
+        self.assertEqual(response.status_code, 201)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_titles(url), ["Birinchi", "Ikkinchi"])
+            self.assertEqual(self.get_titles("/api/news/"), ["Birinchi", "Ikkinchi"])
+
+        news = News.objects.get(pk=response.data["id"])
+        news.department = self.other_department
+
+        with self.captureOnCommitCallbacks(execute=True):
+            news.save()
+
+        self.assertEqual(self.get_titles(url), ["Birinchi"])
+        self.assertEqual(self.get_titles(f"/api/news/?department={self.other_department.pk}"), ["Ikkinchi"])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "news.example.com"])
+    def test_warmed_pages_match_list(self):
+        for i in range(3):
+            News.objects.create(department=self.department, title=f"Yangilik {i}", description="Matn")
+
+        with mock.patch.object(news_feed_cache, "warm_pages", 3), self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/news/", {"title": "Oxirgi", "description": "Matn"}, HTTP_HOST="news.example.com")
+
+        urls = [f"/api/news/?department={self.department.pk}", f"/api/news/?department={self.department.pk}&page=2", "/api/news/?page=3"]
+        warmed = [self.client.get(url, HTTP_HOST="news.example.com") for url in urls]
+
+        news_feed_cache.cache.clear()
+
+        for url, response in zip(urls, warmed):
+            expected = self.client.get(url, HTTP_HOST="news.example.com")
+            self.assertEqual(response.data, expected.data, url)
+            self.assertEqual(response["ETag"], expected["ETag"], url)
+
+    def test_write_does_not_wait_for_warmup(self):
+        url = f"/api/news/?department={self.department.pk}"
+
+        with mock.patch.object(news_feed_cache, "background", True), mock.patch.object(news_feed_cache, "_executor") as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post("/api/news/", {"title": "Ikkinchi", "description": "Matn"})
+
+        executor.submit.assert_called_once()
+
+        # Fon threadi hali ishlamagan: o'quvchi sahifani o'zi tayyorlaydi
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.get_titles(url), ["Birinchi", "Ikkinchi"])
+        self.assertGreater(len(context.captured_queries), 0)
+
+
+class ResponseFormatTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department()
+        cls.employee = Employee.objects.create_user("+998901234567", "password", department=cls.department, is_staff=True)
+        for i in range(30):
+            News.objects.create(department=cls.department, title=f"Yangilik {i}", description="Matn " * 20)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def test_msgpack_negotiation(self):
+        news = News.objects.first()
+        response = self.client.get(f"/api/news/{news.pk}/", HTTP_ACCEPT="application/msgpack")
+
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        data = msgpack.unpackb(response.content)
+        self.assertEqual(data["title"], news.title)
+        self.assertEqual(data["updated_at"], self.client.get(f"/api/news/{news.pk}/").json()["updated_at"])
+
+    def test_large_responses_are_compressed(self):
+        response = self.client.get("/api/news/?page_size=30&q=matn", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))["results"]), 30)
+
+        self.assertEqual(self.client.get("/api/news/?page_size=30&q=matn", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_html_is_not_compressed_with_brotli(self):
+        response = self.client.get("/api/news/?page_size=30&q=matn", HTTP_ACCEPT="text/html", HTTP_ACCEPT_ENCODING="br, gzip")
+
+        self.assertEqual(response["Content-Type"].split(";")[0], "text/html")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_not_modified_etag_matches(self):
+        url = f"/api/news/{News.objects.first().pk}/"
+        etag = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertTrue(etag.startswith('W/"'))
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(f"/api/news/{News.objects.first().pk}/", HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertNotIn("Content-Encoding", response)
+
+
+class SQLiteTuningTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "stress.sqlite3")
+
+    def connect(self):
+        # Test bazasi xotirada (shared cache), parallel yozuvchilar uchun haqiqiy fayl kerak
+        return DatabaseWrapper({**connections["default"].settings_dict, "NAME": self.path}, alias="stress")
+
+    def test_pragmas_applied(self):
+        stress = self.connect()
+        self.addCleanup(stress.close)
+
+        with stress.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS["busy_timeout"])
+
+    def test_concurrent_writers(self):
+        workers, iterations = 8, 50
+
+        stress = self.connect()
+        with stress.cursor() as cursor:
+            cursor.execute("CREATE TABLE counter (id INTEGER PRIMARY KEY, worker INTEGER, total INTEGER)")
+        stress.close()
+
+        def write(worker):
+            connections["stress"] = self.connect()
+
+            try:
+                for _ in range(iterations):
+                    # send_otp / so'rov yaratish kabi: avval o'qish, keyin yozish
+                    with transaction.atomic(using="stress"), connections["stress"].cursor() as cursor:
+                        cursor.execute("SELECT COUNT(*) FROM counter")
+                        cursor.execute("INSERT INTO counter (worker, total) VALUES (%s, %s)", [worker, cursor.fetchone()[0]])
+            finally:
+                connections["stress"].close()
+                del connections["stress"]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(write, range(workers)))
+
+        stress = self.connect()
+        self.addCleanup(stress.close)
+
+        with stress.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*), COUNT(DISTINCT total) FROM counter")
+            # Har bir tranzaksiya oldingilarining hammasini ko'rgan
+            self.assertEqual(cursor.fetchone(), (workers * iterations, workers * iterations))
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    aliases = {"PRIMARY": "router_primary", "REPLICA": "router_replica"}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        # Ikkita alohida SQLite fayl: asosiy baza va uning replikasi
+        databases = {}
+        for alias in self.aliases.values():
+            databases[alias] = {**connections["default"].settings_dict, "NAME": os.path.join(directory.name, f"{alias}.sqlite3")}
+            connections[alias] = DatabaseWrapper(databases[alias], alias)
+            self.addCleanup(self.remove_connection, alias)
+
+        override = override_settings(DATABASE_REPLICA={**settings.DATABASE_REPLICA, **self.aliases, "PIN_SECONDS": 5})
+        override.enable()
+        self.addCleanup(override.disable)
+
+        # Replika - asosiy bazaning eski nusxasi
+        primary = connections[self.aliases["PRIMARY"]]
+        with primary.schema_editor() as editor:
+            editor.create_model(Department)
+        primary.close()
+        shutil.copy(databases[self.aliases["PRIMARY"]]["NAME"], databases[self.aliases["REPLICA"]]["NAME"])
+
+        caches[settings.DATABASE_REPLICA["CACHE"]].clear()
+        self.middleware = ReplicaPinMiddleware(self.view)
+        self.factory = RequestFactory()
+
+    def remove_connection(self, alias):
+        connections[alias].close()
+        del connections[alias]
+
+    def view(self, request):
+        if "name" in request.POST:
+            create_department(request.POST["name"])
+        if "rename" in request.GET:
+            Department.objects.update(name=request.GET["rename"])
+        if "lookup" in request.GET:
+            # Masalan qidiruv indeksi asosiy baza ulanishini so'raydi, lekin yozmaydi
+            router.db_for_write(Department)
+
+        return JsonResponse(list(Department.objects.order_by("id").values_list("name", flat=True)), safe=False)
+
+    def get(self, token):
+        return json.loads(self.middleware(self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")).content)
+
+    def test_reads_go_to_replica(self):
+        create_department("Yangi")
+
+        self.assertEqual(Department.objects.using(self.aliases["PRIMARY"]).count(), 1)
+        self.assertEqual(self.get("a"), [])
+
+    def test_writer_sticks_to_primary(self):
+        response = self.middleware(self.factory.post("/", {"name": "Yangi"}, HTTP_AUTHORIZATION="Bearer a"))
+        self.assertEqual(json.loads(response.content), ["Yangi"])
+
+        self.assertEqual(self.get("a"), ["Yangi"])
+        self.assertEqual(self.get("b"), [])
+
+        with mock.patch("time.time", return_value=time.time() + 6):
+            self.assertEqual(self.get("a"), [])
+
+    def test_only_real_writes_pin(self):
+        self.middleware(self.factory.get("/?lookup=1", HTTP_AUTHORIZATION="Bearer a"))
+        self.middleware(self.factory.post("/", {}, HTTP_AUTHORIZATION="Bearer a"))
+        Department.objects.using(self.aliases["PRIMARY"]).create(name="Yangi", region="Toshkent", district="Chilonzor")
+        self.assertEqual(self.get("a"), [])
+
+        # Signal yubormaydigan yozish ham hisobga olinadi
+        self.middleware(self.factory.get("/?rename=Boshqa", HTTP_AUTHORIZATION="Bearer a"))
+        self.assertEqual(self.get("a"), ["Boshqa"])
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+# Cheklov -> so'rov ma'lumotidagi maydon ("ip" so'rov manzilidan olinadi)
+SCOPE_FIELDS = {"stir": "stir", "phone": "phone_number"}
+
+
+def window_weight(now, window):
+    # Oldingi oynaning hali "ko'rinib turgan" ulushi
+    return 1 - (now % window) / window
+
+
+class LocalWindowCounter:
+    """
+    Jarayon ichidagi sliding window hisoblagichlari: har bir kalit uchun joriy va oldingi oyna soni.
+
+    Kalitlar soni `max_size` bilan cheklangan, eng eski ishlatilgani o'chiriladi. Har bir amal O(1).
+    """
+
+    def __init__(self, max_size=100_000):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, now):
+        """
+        Urinishni qo'shadi va oxirgi `window` soniyadagi taxminiy sonni qaytaradi.
+        """
+        index = int(now // window)
+
+        with self._lock:
+            current, previous = self._counts(key, index)
+            self._data[key] = (index, current + 1, previous)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+        return previous * window_weight(now, window) + current + 1
+
+    def reset(self, key, window, now):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _counts(self, key, index):
+        item = self._data.get(key)
+
+        if item is None or item[0] < index - 1:
+            return 0, 0
+        if item[0] == index - 1:
+            return 0, item[1]
+        return item[1], item[2]
+
+
+class CacheWindowCounter:
+    """
+    Django cache backend dagi sliding window hisoblagichlari (bir nechta jarayon uchun umumiy).
+    """
+
+    key_prefix = "otp-throttle:"
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        current_key = f"{self.key_prefix}{key}:{index}"
+
+        self.cache.add(current_key, 0, timeout=2 * window)
+
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # Kalit add va incr orasida o'chib ketdi
+            self.cache.set(current_key, 1, timeout=2 * window)
+            current = 1
+
+        previous = self.cache.get(f"{self.key_prefix}{key}:{index - 1}", 0)
+        return previous * window_weight(now, window) + current
+
+    def reset(self, key, window, now):
+        index = int(now // window)
+        self.cache.delete_many([f"{self.key_prefix}{key}:{index}", f"{self.key_prefix}{key}:{index - 1}"])
+
+    def clear(self):
+        pass
+
+
+class OTPRateLimiter:
+    """
+    send_otp / verify_otp uchun IP, STIR va telefon raqami bo'yicha cheklovlar hamda noto'g'ri kodlar uchun bloklash.
+
+    Hisoblagichlar jarayon ichida yoki `backend` berilsa umumiy Django cache da. Bloklangan kalitlar har doim jarayon
+    ichida ham eslab qolinadi, shuning uchun hujum davomidagi takroriy so'rovlar keshga ham bormaydi.
+    """
+
+    def __init__(self, rates, max_attempts=5, lockout=900, max_size=100_000, backend=None):
+        self.rates = rates
+        self.max_attempts = max_attempts
+        self.lockout = lockout
+        self.counter = CacheWindowCounter(backend) if backend else LocalWindowCounter(max_size)
+        self.backend_alias = backend
+        self._blocked_until = OrderedDict()
+        self._max_size = max_size
+        self._lock = threading.Lock()
+
+    def check(self, action, idents, now=None):
+        """
+        So'rovni hisobga oladi. Ruxsat bo'lsa None, aks holda kutish kerak bo'lgan soniyalar.
+        """
+        now = time.time() if now is None else now
+        wait = None
+
+        for scope, value in idents.items():
+            if not value or scope not in self.rates.get(action, {}):
+                continue
+
+            key = f"{action}:{scope}:{value}"
+            limit, window = self.rates[action][scope]
+
+            blocked = self._get_block(key, now)
+            if blocked is None and self.counter.hit(key, window, now) > limit:
+                blocked = self._block(key, now + window - now % window, now)
+
+            if blocked is not None:
+                wait = max(wait or 0, blocked)
+
+        return wait
+
+    def verify_failed(self, phone_number, now=None):
+        """
+        Noto'g'ri kod. `max_attempts` ga yetsa raqam `lockout` soniyaga bloklanadi va True qaytadi.
+        """
+        now = time.time() if now is None else now
+
+        if self.counter.hit(f"verify_otp:failed:{phone_number}", self.lockout, now) < self.max_attempts:
+            return False
+
+        self._block(f"verify_otp:phone:{phone_number}", now + self.lockout, now)
+        return True
+
+    def verify_succeeded(self, phone_number, now=None):
+        self.counter.reset(f"verify_otp:failed:{phone_number}", self.lockout, time.time() if now is None else now)
+
+    def clear(self):
+        self.counter.clear()
+
+        with self._lock:
+            self._blocked_until.clear()
+
+    def _get_block(self, key, now):
+        until = self._blocked_until.get(key)
+
+        if until is None and self.backend_alias:
+            until = caches[self.backend_alias].get(f"{CacheWindowCounter.key_prefix}blocked:{key}")
+
+        return until - now if until is not None and until > now else None
+
+    def _block(self, key, until, now):
+        with self._lock:
+            self._blocked_until[key] = until
+            self._blocked_until.move_to_end(key)
+
+            while len(self._blocked_until) > self._max_size:
+                self._blocked_until.popitem(last=False)
+
+        if self.backend_alias:
+            caches[self.backend_alias].set(f"{CacheWindowCounter.key_prefix}blocked:{key}", until, timeout=int(until - now) + 1)
+
+        return until - now
+
+
+def get_idents(request, data):
+    """
+    So'rovdan cheklov kalitlari: {"ip": ..., "stir": ..., "phone": ...}.
+    """
+    data = data if isinstance(data, dict) else {}
+    idents = {"ip": BaseThrottle().get_ident(request)}
+
+    for scope, field in SCOPE_FIELDS.items():
+        value = data.get(field)
+        idents[scope] = str(value).strip() if value is not None else None
+
+    return idents
+
+
+class OTPRateThrottle(BaseThrottle):
+    """
+    DRF throttle: `view.action` bo'yicha `otp_limiter` cheklovlari.
+    """
+
+    def allow_request(self, request, view):
+        self.wait_seconds = otp_limiter.check(view.action, get_idents(request, request.data))
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+def _build_otp_limiter():
+    options = getattr(settings, "OTP_THROTTLE", {})
+
+    return OTPRateLimiter(
+        rates=options.get("RATES", {}),
+        max_attempts=options.get("MAX_ATTEMPTS", 5),
+        lockout=options.get("LOCKOUT", 900),
+        max_size=options.get("MAX_SIZE", 100_000),
+        backend=options.get("BACKEND"),
+    )
+
+
+otp_limiter = _build_otp_limiter()
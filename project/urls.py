@@ -1,3 +1,8 @@
 from django.urls import path
 
-urlpatterns = []
+from .views import profiling_stats, request_events
+
+urlpatterns = [
+    path("profiling/stats/", profiling_stats, name="profiling-stats"),
+    path("events/requests/", request_events, name="request-events"),
+]
@@ -1,18 +1,265 @@
+import asyncio
+import math
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
-import telebot
+import httpx
+import requests
 from django.conf import settings
 from django.utils.timezone import localtime, now
-from django.conf import settings
+from requests.adapters import HTTPAdapter
 
-from .models import Company, CompanyToken
+from .models import CompanyToken
 
-def send_otp_code(number: str, code: int):
-    bot = telebot.TeleBot(settings.BOT_TOKEN)
 
+class TelegramError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Har bir kalit (chat) uchun alohida token bucket va umumiy global limit.
+    """
+
+    def __init__(self, global_rate=30, group_rate=20 / 60, private_rate=1):
+        self.global_rate = global_rate
+        self.group_rate = group_rate
+        self.private_rate = private_rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def rate_for(self, chat_id):
+        # Telegramda guruh va kanallar ID si manfiy bo'ladi
+        return self.group_rate if str(chat_id).startswith("-") else self.private_rate
+
+    def reserve(self, key, rate):
+        """
+        Keyingi ruxsat etilgan vaqtni band qiladi va kutish kerak bo'lgan soniyalarni qaytaradi.
+        """
+        with self._lock:
+            current = time.monotonic()
+            available_at = max(self._buckets.get(key, current), current)
+            self._buckets[key] = available_at + 1 / rate
+            return available_at - current
+
+    def capacity(self, chat_id, seconds):
+        """
+        Shu chatga keyingi `seconds` soniya ichida kutib qolmasdan qancha xabar yuborish mumkinligi (band qilmaydi).
+        """
+        current = time.monotonic()
+
+        with self._lock:
+            limits = [
+                (self._buckets.get(("chat", str(chat_id)), current), self.rate_for(chat_id)),
+                (self._buckets.get("global", current), self.global_rate),
+            ]
+
+        return min(max(math.floor((current + seconds - max(available_at, current)) * rate) + 1, 0) for available_at, rate in limits)
+
+    def delay(self, chat_id):
+        return max(self.reserve(("chat", str(chat_id)), self.rate_for(chat_id)), self.reserve("global", self.global_rate))
+
+    def acquire(self, chat_id):
+        delay = self.delay(chat_id)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, chat_id):
+        delay = self.delay(chat_id)
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def parse_response(response):
+    """
+    Bot API javobidan natija. Xatolik (jumladan JSON bo'lmagan javob) TelegramError bo'ladi.
+    """
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+
+    if response.status_code == 200 and isinstance(data, dict) and "result" in data:
+        return data["result"]
+
+    retry_after = None
+    if response.status_code == 429:
+        parameters = data.get("parameters") if isinstance(data, dict) else None
+        retry_after = (parameters or {}).get("retry_after") or response.headers.get("Retry-After")
+
+    raise TelegramError(f"Telegram {response.status_code}: {response.text[:512]}", retry_after=int(retry_after) if str(retry_after or "").isdigit() else None)
+
+
+class TelegramBotClient:
+    """
+    Jarayon bo'yicha yagona Telegram mijozi: keep-alive sessiya, ulanishlar puli va rate limit.
+    """
+
+    api_url = "https://api.telegram.org/bot{token}/{method}"
+
+    def __init__(self, token, pool_connections=4, pool_maxsize=16, timeout=10, rate_limiter=None):
+        self.token = token
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize))
+
+    def send_message(self, chat_id, text, thread_id=None, parse_mode="HTML"):
+        payload = {"chat_id": chat_id, "text": text, "parse_mode": parse_mode}
+
+        if thread_id:
+            payload["message_thread_id"] = thread_id
+
+        self.rate_limiter.acquire(chat_id)
+
+        try:
+            response = self.session.post(self.api_url.format(token=self.token, method="sendMessage"), json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise TelegramError(str(e)) from e
+
+        return parse_response(response)
+
+    def send_batch(self, messages):
+        """
+        Xabarlar ro'yxatini parallel yuboradi. Har bir xabar uchun natija yoki TelegramError qaytaradi.
+
+        Bitta chatga yuboriladigan xabarlar ketma-ketligi rate limiter orqali saqlanadi.
+        """
+
+        def send(message):
+            try:
+                return self.send_message(**message)
+            except TelegramError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self.pool_maxsize, len(messages) or 1)) as executor:
+            return list(executor.map(send, messages))
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncTelegramBotClient:
+    """
+    TelegramBotClient ning asyncio varianti (httpx.AsyncClient), ASGI viewlar uchun.
+    """
+
+    api_url = TelegramBotClient.api_url
+
+    def __init__(self, token, pool_maxsize=16, timeout=10, rate_limiter=None):
+        self.token = token
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.client = httpx.AsyncClient(timeout=timeout, limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize))
+
+    async def send_message(self, chat_id, text, thread_id=None, parse_mode="HTML"):
+        payload = {"chat_id": chat_id, "text": text, "parse_mode": parse_mode}
+
+        if thread_id:
+            payload["message_thread_id"] = thread_id
+
+        await self.rate_limiter.aacquire(chat_id)
+
+        try:
+            response = await self.client.post(self.api_url.format(token=self.token, method="sendMessage"), json=payload)
+        except httpx.HTTPError as e:
+            raise TelegramError(str(e)) from e
+
+        return parse_response(response)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class StubAsyncBotClient(AsyncTelegramBotClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent = []
+
+    async def send_message(self, chat_id, text, thread_id=None, parse_mode="HTML"):
+        self.sent.append({"chat_id": chat_id, "text": text, "thread_id": thread_id, "parse_mode": parse_mode})
+        return {"message_id": len(self.sent)}
+
+
+class StubBotClient(TelegramBotClient):
+    """
+    Tarmoqsiz ishlaydigan mijoz, yuborilgan xabarlar `sent` ro'yxatida saqlanadi.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent = []
+
+    def send_message(self, chat_id, text, thread_id=None, parse_mode="HTML"):
+        self.sent.append({"chat_id": chat_id, "text": text, "thread_id": thread_id, "parse_mode": parse_mode})
+        return {"message_id": len(self.sent)}
+
+
+_bot_client = None
+_bot_client_lock = threading.Lock()
+_async_bot_clients = weakref.WeakKeyDictionary()
+
+
+def build_rate_limiter(options):
+    return RateLimiter(
+        global_rate=options.get("GLOBAL_RATE", 30),
+        group_rate=options.get("GROUP_RATE", 20 / 60),
+        private_rate=options.get("PRIVATE_RATE", 1),
+    )
+
+
+def get_bot_client() -> TelegramBotClient:
+    global _bot_client
+
+    if _bot_client is None:
+        with _bot_client_lock:
+            if _bot_client is None:
+                options = settings.TELEGRAM_CLIENT
+                client_class = StubBotClient if options.get("STUB") else TelegramBotClient
+
+                _bot_client = client_class(
+                    settings.BOT_TOKEN,
+                    pool_connections=options.get("POOL_CONNECTIONS", 4),
+                    pool_maxsize=options.get("POOL_MAXSIZE", 16),
+                    timeout=options.get("TIMEOUT", 10),
+                    rate_limiter=build_rate_limiter(options),
+                )
+
+    return _bot_client
+
+
+def get_async_bot_client() -> AsyncTelegramBotClient:
+    """
+    Har bir event loop uchun bitta async mijoz (httpx ulanishlari loopga bog'langan).
+    """
+    loop = asyncio.get_running_loop()
+
+    if loop not in _async_bot_clients:
+        options = settings.TELEGRAM_CLIENT
+        client_class = StubAsyncBotClient if options.get("STUB") else AsyncTelegramBotClient
+        # Rate limit sinxron mijoz bilan umumiy, ikkalasi bitta bot token limitiga bo'ysunadi
+        _async_bot_clients[loop] = client_class(
+            settings.BOT_TOKEN,
+            pool_maxsize=options.get("POOL_MAXSIZE", 16),
+            timeout=options.get("TIMEOUT", 10),
+            rate_limiter=get_bot_client().rate_limiter,
+        )
+
+    return _async_bot_clients[loop]
+
+
+def otp_message(number: str, code: int):
     expired_at = (localtime(now()) + timedelta(minutes=5)).strftime("%H:%M")
 
-    message = (
+    return (
         "🔔 <b>Telefon raqami uchun tasdiqlash kodi:</b>\n\n"
         f"📞 <b>Telefon:</b> <code>{number}</code>\n"
         f"🔓 <b>Kod:</b> <code>{code}</code>\n"
@@ -20,9 +267,14 @@ def send_otp_code(number: str, code: int):
         "ℹ️ Iltimos, kodni hech kim bilan ulashmang!"
     )
 
-    bot.send_message("-1002354764356", message, message_thread_id=236, parse_mode="HTML")
 
-    print(f"Kod yuborildi: {number} -> {code}")
+def send_otp_code(number: str, code: int):
+    message = otp_message(number, code)
+
+    from .messaging import dispatcher
+
+    # Telegramga yuborish fon rejimida, so'rov kutib qolmaydi
+    dispatcher.enqueue(settings.OTP_CHAT_ID, message, thread_id=settings.OTP_THREAD_ID)
 
 
 def generate_token_for_company(company):
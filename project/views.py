@@ -1,23 +1,49 @@
+import json
+import math
 import random
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
-from django.utils.timezone import now
-from drf_yasg.utils import swagger_auto_schema
+from django.urls import reverse
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_yasg import openapi
+from drf_yasg.utils import no_body, swagger_auto_schema
 from rest_framework import decorators, mixins, permissions, status, viewsets
 from rest_framework.decorators import api_view
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from project.swagger_serializers import EmployeeIdSerializer
 
+from .caches import company_token_cache
+from .conditional import ConditionalGetMixin
+from .events import ALL_REQUESTS_CHANNEL, broker, company_channel, employee_channel, format_sse
+from .exports import ExportMixin
+from .feeds import ALL_DEPARTMENTS, news_feed_cache
+from .fieldsets import SparseFieldsetMixin, get_field_spec
+from .images import schedule_variants
+from .imports import import_companies
 from .models import OTP, Company, Employee, News, Request, RequestImage
-from .permissions import CompanyIsAuthenticated, CompanyOrRequestUser, IsAdminOrReadOnly
+from .middleware import is_jwt
+from .permissions import CompanyIsAuthenticated, CompanyOrRequestUser, IsAdminOrReadOnly, IsDirectorOrAdmin
+from .profiling import view_stats
+from .search import FullTextSearchFilter, get_search_index
 from .serializers import *
+from .stats import get_statistics, request_created
+from .throttling import OTPRateThrottle, otp_limiter
 from .utils import generate_token_for_company, send_otp_code
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all().order_by("id")
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -30,40 +56,215 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         return serializer.save(department=self.request.user.department)
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
-    queryset = Company.objects.all()
+class CompanyViewSet(SparseFieldsetMixin, ConditionalGetMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = Company.objects.all().order_by("id")
     serializer_class = CompanySerializer
     permission_classes = [permissions.IsAdminUser]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ["stir"]
+    export_filename = "companies"
+    export_fields = [
+        ("ID", "id"),
+        ("Nomi", "name"),
+        ("STIR", "stir"),
+        ("Telefon", "phone_number"),
+        ("Holati", "status"),
+        ("Viloyat", "region"),
+        ("Tuman", "district"),
+        ("Turi", "company_type__name"),
+        ("Bo'lim", "department__name"),
+    ]
+    import_max_errors = 1000
+
+    @swagger_auto_schema(
+        method="post",
+        request_body=no_body,
+        manual_parameters=[
+            openapi.Parameter("file", openapi.IN_FORM, type=openapi.TYPE_FILE, required=True, description="CSV yoki XLSX, birinchi qator - sarlavhalar"),
+        ],
+    )
+    @decorators.action(["POST"], detail=False, url_path="import", parser_classes=[MultiPartParser])
+    def import_file(self, request, *args, **kwargs):
+        """
+        Kompaniyalarni CSV/XLSX fayldan ommaviy yuklash. STIR bo'yicha mavjudlari yangilanadi.
+
+        Ustunlar: name, stir, phone_number, status, region, district, company_type, department (yoki eksportdagi nomlar).
+        Bo'lim va kompaniya turi id yoki nomi bilan beriladi. Xatolik bo'lgan qatorlar o'tkazib yuboriladi va hisobotda qaytadi.
+        Fayl o'qilmasa (UTF-8 emas, buzilgan XLSX) 400 qaytadi.
+        """
+        file = request.FILES.get("file")
+
+        if file is None:
+            return Response({"file": ["Fayl yuborilmadi."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_companies(file, name=file.name, max_errors=self.import_max_errors)
+
+        if not report["error_count"]:
+            response_status = status.HTTP_200_OK
+        elif report["file_error"] or not report["created"] + report["updated"]:
+            # Fayl oxirigacha o'qilmadi, oldingi partiyalar hisobotda
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+
+        return Response(report, status=response_status)
 
 
-class RequestsViewSet(viewsets.ModelViewSet):
-    queryset = Request.objects.all().order_by("id")
+class RequestsViewSet(SparseFieldsetMixin, ConditionalGetMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = Request.objects.order_by("id")
     serializer_class = RequestSerializer
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
     filterset_fields = ["uploader", "performer"]
     permission_classes = [CompanyOrRequestUser]
+    export_filename = "requests"
+    export_fields = [
+        ("ID", "id"),
+        ("Kompaniya", "company__name"),
+        ("STIR", "company__stir"),
+        ("Muhimligi", "priority"),
+        ("Tavsif", "description"),
+        ("Kenglik", "lat"),
+        ("Uzunlik", "long"),
+        ("Holati", "status"),
+        ("Yuklovchi", "uploader__phone_number"),
+        ("Ijrochi", "performer__phone_number"),
+    ]
+    bulk_create_max_items = 100
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        # list/retrieve querysetini SparseFieldsetMixin maydonlarga moslab qisqartiradi
+        return queryset if self.action in self.sparse_actions else queryset.for_serialization()
 
     def perform_create(self, serializer):
         uploader = self.request.user if not isinstance(self.request.user, AnonymousUser) else None
 
         return serializer.save(uploader=uploader)
 
+    @swagger_auto_schema(
+        method="post",
+        request_body=no_body,
+        manual_parameters=[
+            openapi.Parameter("items", openapi.IN_FORM, type=openapi.TYPE_STRING, required=True, description="So'rovlar ro'yxati (JSON)"),
+            openapi.Parameter("images[0]", openapi.IN_FORM, type=openapi.TYPE_FILE, description="0-so'rov rasmlari, keyingilari images[1], ..."),
+        ],
+    )
+    @decorators.action(["POST"], detail=False, url_path="bulk_create", parser_classes=[MultiPartParser, FormParser])
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Bir nechta so'rovni bitta multipart so'rovda yaratish.
+
+        `items` - so'rovlar ro'yxati (JSON), har bir so'rov rasmlari `images[<index>]` maydonida yuboriladi.
+        """
+        try:
+            items = json.loads(request.data.get("items", ""))
+        except (TypeError, ValueError):
+            return Response({"items": ["JSON ro'yxat kutilgan."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not isinstance(items, list) or not items or len(items) > self.bulk_create_max_items:
+            return Response({"items": [f"1 dan {self.bulk_create_max_items} tagacha so'rov yuborish mumkin."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        results, valid = [], []
+
+        for index, item in enumerate(items):
+            data = dict(item) if isinstance(item, dict) else {}
+
+            if f"images[{index}]" in request.FILES:
+                data["images"] = request.FILES.getlist(f"images[{index}]")
+            serializer = self.get_serializer(data=data)
+
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+                results.append({"index": index, "status": "created"})
+            else:
+                results.append({"index": index, "status": "error", "errors": serializer.errors})
+
+        if valid:
+            uploader = request.user if not isinstance(request.user, AnonymousUser) else None
+
+            created = self.create_in_bulk([data for index, data in valid], uploader)
+
+            for (index, data), request_obj in zip(valid, created):
+                results[index]["id"] = request_obj.pk
+
+        if len(valid) == len(items):
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS if valid else status.HTTP_400_BAD_REQUEST
+
+        return Response({"created": len(valid), "results": results}, status=response_status)
+
+    def create_in_bulk(self, validated_items, uploader):
+        request_objs, images = [], []
+
+        for data in validated_items:
+            data = dict(data)
+            images.append(data.pop("images"))
+
+            request_obj = Request(uploader=uploader, **data)
+            request_obj.update_geohash()
+            request_objs.append(request_obj)
+
+        with transaction.atomic():
+            Request.objects.bulk_create(request_objs, batch_size=500)
+
+            image_objs = RequestImage.objects.bulk_create(
+                [RequestImage(request=request_obj, image=image) for request_obj, files in zip(request_objs, images) for image in files],
+                batch_size=500,
+            )
+
+            # bulk_create post_save signalini chaqirmaydi
+            for image_obj in image_objs:
+                schedule_variants(image_obj)
+
+            get_search_index(Request).update(request_objs)
+            request_created(request_objs)
+
+        return request_objs
+
     @swagger_auto_schema(method="put", request_body=EmployeeIdSerializer, responses={200: RequestSerializer})
     @decorators.action(["PUT"], detail=True)
     def assign(self, request, *args, **kwargs):
 
         employee_id = request.data.get("employee_id")
 
-        employee = get_object_or_404(Employee, pk=employee_id)
+        employee = get_object_or_404(Employee.objects.select_related("department"), pk=employee_id)
 
         request = self.get_object()
         request.performer = employee
-        request.save()
+
+        # Ijrochi o'zgarishi va statistika hisoblagichlari (post_save signalida) bitta tranzaksiyada
+        with transaction.atomic():
+            request.save(update_fields=["performer"])
 
         serializer = self.get_serializer(request)
 
         return Response(serializer.data)
 
+    @decorators.action(["GET"], detail=False, permission_classes=[IsDirectorOrAdmin])
+    def stats(self, request, *args, **kwargs):
+        """
+        So'rovlar soni holat, muhimlik, bo'lim, viloyat va ijrochi kesimida (hisoblagichlar jadvalidan).
+        """
+        return Response(get_statistics(), status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(method="get", query_serializer=NearbyRequestsSerializer, responses={200: RequestSerializer(many=True)})
+    @decorators.action(["GET"], detail=False)
+    def nearby(self, request, *args, **kwargs):
+        params = NearbyRequestsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        lat, long = params.validated_data["lat"], params.validated_data["long"]
+        items = self.filter_queryset(self.get_queryset()).nearby(lat, long, params.validated_data["radius"], params.validated_data["limit"])
+
+        data = self.get_serializer(items, many=True).data
+
+        for item, obj in zip(data, items):
+            item["distance"] = round(obj.distance, 1)
+
+        return Response(data, status=status.HTTP_200_OK)
+
 
 class CompanyAuthenticationViewSet(viewsets.GenericViewSet):
     queryset = Company.objects.all()
@@ -79,7 +280,7 @@ class CompanyAuthenticationViewSet(viewsets.GenericViewSet):
         }
         return serializer_classes[self.action] if self.action in serializer_classes else self.serializer_class
 
-    @decorators.action(["POST"], detail=False)
+    @decorators.action(["POST"], detail=False, throttle_classes=[OTPRateThrottle])
     def send_otp(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid()
@@ -90,15 +291,16 @@ class CompanyAuthenticationViewSet(viewsets.GenericViewSet):
         otp_code = str(random.randint(100000, 999999))
 
         if company.phone_number:
-            otp, created = OTP.objects.update_or_create(company=company, defaults={"code": otp_code, "created_at": now()})
+            with transaction.atomic():
+                otp, created = OTP.objects.issue(company, otp_code)
 
-            send_otp_code(number=company.phone_number, code=otp_code)
+                send_otp_code(number=company.phone_number, code=otp_code)
 
             return Response({"message": "Tasdiqlash kodi muvaffaqqiyatli yuborildi", "phone": company.phone_number}, status=status.HTTP_200_OK)
         else:
             return Response({"message": "Kompaniyaga telefon raqam biriktirilmagan"}, status=status.HTTP_400_BAD_REQUEST)
 
-    @decorators.action(["POST"], detail=False)
+    @decorators.action(["POST"], detail=False, throttle_classes=[OTPRateThrottle])
     def verify_otp(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -107,15 +309,26 @@ class CompanyAuthenticationViewSet(viewsets.GenericViewSet):
 
         try:
             company = Company.objects.get(phone_number=phone_number)
-            otp = OTP.objects.get(company=company, code=code)
-        except (Company.DoesNotExist, OTP.DoesNotExist):
+        except Company.DoesNotExist:
+            otp_limiter.verify_failed(phone_number)
             return Response({"detail": "Telefon raqami yoki OTP kodi noto'g'ri."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if otp.is_expired():
-            return Response({"detail": "OTP kodi muddati tugagan."}, status=status.HTTP_400_BAD_REQUEST)
+        # Kod bitta DELETE bilan tekshiriladi va ishlatiladi: bir vaqtdagi ikkinchi so'rov uni topa olmaydi
+        deleted, _ = OTP.objects.active().filter(company=company, code=code).delete()
+
+        if not deleted:
+            expired = OTP.objects.filter(company=company, code=code).exists()
+
+            if otp_limiter.verify_failed(phone_number):
+                # Urinishlar tugadi: kodni terib topishning imkoni qolmasligi uchun u bekor qilinadi
+                OTP.objects.filter(company=company).delete()
 
-        otp.delete()
+            if expired:
+                return Response({"detail": "OTP kodi muddati tugagan."}, status=status.HTTP_400_BAD_REQUEST)
 
+            return Response({"detail": "Telefon raqami yoki OTP kodi noto'g'ri."}, status=status.HTTP_400_BAD_REQUEST)
+
+        otp_limiter.verify_succeeded(phone_number)
         token = generate_token_for_company(company)
 
         return Response(
@@ -132,16 +345,188 @@ class CompanyAuthenticationViewSet(viewsets.GenericViewSet):
 
     @decorators.action(methods=["GET"], detail=False, permission_classes=[CompanyIsAuthenticated])
     def requests(self, request, *args, **kwargs):
-        queryset = request.company.requests.all()
+        # related manager emas: u har bir obyektga kompaniyani biriktiradi va qoldirilgan company_id ni alohida o'qiydi
+        queryset = Request.objects.filter(company=request.company).order_by("id")
+        queryset = RequestSerializer.optimize_queryset(queryset, *get_field_spec(request), exclude_fields=["company"])
 
         return Response(RequestSerializer(queryset, many=True, context={"request": request}, exclude_fields=["company"]).data, status=status.HTTP_200_OK)
 
 
-class NewsViewSet(viewsets.ModelViewSet):
-    queryset = News.objects.all()
+class NewsViewSet(SparseFieldsetMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = News.objects.all().order_by("id")
     serializer_class = NewsSerializer
     permission_classes = [IsAdminOrReadOnly]
     parser_classes = [FormParser, MultiPartParser]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    filterset_fields = ["department"]
+
+    # Faqat shu parametrlar bilan ochilgan lenta sahifalari keshlanadi
+    feed_params = {"department", "page", "page_size"}
+
+    def get_feed_department(self):
+        """
+        Keshlanadigan lenta uchun bo'lim (yoki ALL_DEPARTMENTS), boshqa so'rovlar uchun None.
+        """
+        params = self.request.query_params
+
+        if not set(params) <= self.feed_params:
+            return None
+
+        department = params.get("department", ALL_DEPARTMENTS)
+        return department if department == ALL_DEPARTMENTS or department.isdigit() else None
+
+    def list(self, request, *args, **kwargs):
+        department = self.get_feed_department()
+
+        if department is None:
+            return super().list(request, *args, **kwargs)
+
+        params = request.query_params
+        key = self.get_feed_key(department, f"{request.scheme}://{request.get_host()}", params.get("page", "1"), params.get("page_size", ""))
+        entry = news_feed_cache.get(key)
+
+        if entry is None:
+            # Keshda bo'lmasa holat (ETag uchun) va sahifa bir marta hisoblanadi, keyingi o'qishlar bazaga bormaydi
+            summary = self.get_list_summary(self.get_feed_queryset(department))
+            entry = {"summary": summary, "data": super(ConditionalGetMixin, self).list(request, *args, **kwargs).data}
+            news_feed_cache.set(key, entry)
+
+        return self.conditional_response(request, self.get_list_etag(entry["summary"]), None, lambda: Response(entry["data"]))
+
+    def get_feed_key(self, department, origin, page, page_size=""):
+        return news_feed_cache.page_key(department, news_feed_cache.get_version(department), origin, page, page_size)
+
+    def get_feed_queryset(self, department):
+        # Filtr backend bo'limni alohida so'rov bilan tekshiradi, lenta uchun to'g'ridan-to'g'ri filtr
+        queryset = self.get_serializer_class().optimize_queryset(self.queryset.all(), None, None)
+        return queryset if department == ALL_DEPARTMENTS else queryset.filter(department_id=department)
 
     def perform_create(self, serializer):
-        return serializer.save(department=self.request.user.department)
+        news = serializer.save(department=self.request.user.department)
+        self.warm_feed([news.department_id])
+        return news
+
+    def perform_update(self, serializer):
+        news = serializer.save()
+        self.warm_feed([news.department_id])
+
+    def perform_destroy(self, instance):
+        department = instance.department_id
+        instance.delete()
+        self.warm_feed([department])
+
+    def warm_feed(self, departments):
+        """
+        Yozishdan keyin yangi versiya sahifalarini fonda oldindan keshlaydi (o'quvchilar sovuq keshga tushmasligi uchun).
+        """
+        request = self.request
+        departments = [*departments, ALL_DEPARTMENTS]
+
+        def warm():
+            for department in departments:
+                for page in range(1, news_feed_cache.warm_pages + 1):
+                    key = self.get_feed_key(department, f"{request.scheme}://{request.get_host()}", str(page))
+                    entry = self.render_feed_page(department, page, request)
+                    news_feed_cache.set(key, entry)
+
+                    if not entry["data"]["next"]:
+                        break
+
+        news_feed_cache.schedule_warm(warm)
+
+    def render_feed_page(self, department, page, request):
+        """
+        Lenta sahifasi keshdagi ko'rinishda: `?department=&page=` so'roviga list() beradigan javob bilan bir xil.
+        Havolalar va rasm URL lari `request` (yozish so'rovi) host va sxemasidan olinadi.
+        """
+        queryset = self.get_feed_queryset(department)
+        page_size = self.paginator.page_size
+        page_obj = DjangoPaginator(queryset, page_size).page(page)
+
+        url = request.build_absolute_uri(reverse("news-list"))
+        if department != ALL_DEPARTMENTS:
+            url = replace_query_param(url, "department", department)
+        if page > 1:
+            url = replace_query_param(url, "page", page)
+
+        previous = None
+        if page_obj.has_previous():
+            previous = remove_query_param(url, "page") if page == 2 else replace_query_param(url, "page", page - 1)
+
+        serializer = self.get_serializer_class()(page_obj.object_list, many=True, context={"request": request, "view": self}, fields=None, expand=None)
+        count = page_obj.paginator.count
+
+        data = {
+            "count": count,
+            "next": replace_query_param(url, "page", page + 1) if page_obj.has_next() else None,
+            "previous": previous,
+            "page_count": math.ceil(count / page_size),
+            "results": serializer.data,
+        }
+
+        return {"summary": self.get_list_summary(queryset), "data": data}
+
+
+@api_view(["GET"])
+@decorators.permission_classes([permissions.IsAdminUser])
+def profiling_stats(request):
+    return Response({"views": view_stats.summary(), "company_token_cache": company_token_cache.stats()}, status=status.HTTP_200_OK)
+
+
+def get_event_channels(request):
+    """
+    Kompaniya tokeni yoki xodim JWT si bo'yicha obuna kanallari. `Authorization` sarlavhasi yoki `?token=` qabul qilinadi
+    (brauzerdagi EventSource sarlavha yubora olmaydi).
+    """
+    if request.company:
+        return [company_channel(request.company.pk)]
+
+    header = request.META.get("HTTP_AUTHORIZATION", "").split()
+    token = header[1] if len(header) == 2 else request.GET.get("token")
+
+    if not token:
+        return []
+
+    if not is_jwt(token):
+        company = company_token_cache.get_company(token)
+        return [company_channel(company.pk)] if company else []
+
+    authentication = JWTAuthentication()
+
+    try:
+        user = authentication.get_user(authentication.get_validated_token(token))
+    except (InvalidToken, TokenError):
+        return []
+
+    return [employee_channel(user.pk)] + ([ALL_REQUESTS_CHANNEL] if user.is_staff else [])
+
+
+async def request_events(request):
+    """
+    So'rovlar holati va ijrochisi o'zgarishlari uchun Server-Sent Events oqimi. Faqat ASGI (config.asgi) orqali ishlaydi.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "Realtime hodisalar faqat ASGI server orqali ishlaydi."}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    channels = await sync_to_async(get_event_channels)(request)
+
+    if not channels:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+
+    subscription = broker.subscribe(channels)
+    heartbeat = settings.EVENTS.get("HEARTBEAT", 15)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+
+            while True:
+                event = await subscription.get(timeout=heartbeat)
+                yield format_sse(event) if event else ": ping\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response